@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from eth_utils import to_checksum_address
+import Checker
+import Clients
+import Metrics
+import Orchestrator
+import RateLimiter
+import Registry
+
+# Reads addresses from a file or stdin, skipping blank lines and comments
+def read_addresses(stream):
+    for line in stream:
+        address = line.strip()
+        if address and not address.startswith('#'):
+            yield address
+
+# Returns the addresses already written to an earlier output file, checksummed or as given for invalid ones
+def completed_addresses(output_path):
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run is checked again
+                continue
+            if 'address' in record:
+                done.add(record['address'])
+    return done
+
+# Cuts a line left unfinished by an interrupted run off the end of the output file, so appended records start on a line of their own
+def trim_partial_line(output_path):
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        if end != size:
+            f.truncate(end)
+
+# Yields checksummed addresses that have not been seen yet, invalid ones are yielded as (address, None)
+def unique_addresses(addresses, skip):
+    seen = set(skip)
+    for address in addresses:
+        try:
+            checksummed = to_checksum_address(address)
+        except ValueError:
+            if address not in seen:
+                seen.add(address)
+                yield address, None
+            continue
+        if checksummed in seen:
+            continue
+        seen.add(checksummed)
+        yield address, checksummed
+
+# Runs all the selected checks for one token and builds its output record
+def scan_token(address, checks, limiter, check_concurrency, timeouts=None, total_timeout=Orchestrator.ANALYSIS_TIMEOUT, options=None):
+    started = time.time()
+    record = {'address': address, 'results': {}, 'errors': {}}
+    try:
+        checker = Checker.ERC20Checker(address, **(options or {}))
+    except Exception as e:
+        record['errors']['init'] = str(e)
+        record['elapsed'] = round(time.time() - started, 3)
+        return record
+
+    def on_result(i, name, result, error):
+        record['results'][name] = result
+        if error is not None:
+            record['errors'][name] = repr(error)
+
+    Orchestrator.CheckOrchestrator(checker, max_workers=check_concurrency, limiter=limiter, timeouts=timeouts, total_timeout=total_timeout).run(checks, on_result=on_result)
+    # Which backend answered each scraped or indexed result, e.g. http, browser or holder_index
+    if checker.served_by:
+        record['served_by'] = dict(checker.served_by)
+    record['elapsed'] = round(time.time() - started, 3)
+    return record
+
+# Writes one JSON record per line and flushes it so partial output survives an interruption
+def write_record(out, record):
+    out.write(json.dumps(record, default=str) + "\n")
+    out.flush()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check many ERC-20 token addresses and write the results as JSON lines")
+    parser.add_argument('input', nargs='?', default='-', help="file with one address per line, '-' reads stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSONL output file, '-' writes to stdout")
+    parser.add_argument('--check-profile', choices=sorted(Registry.PROFILES), default='full', help="set of checks to run, browserless scrapes pages over plain HTTP without a browser, onchain never scrapes")
+    parser.add_argument('--checks', help="comma separated list of checks to run, defaults to the checks of the profile")
+    parser.add_argument('--workers', type=int, default=8, help="number of tokens checked at the same time")
+    parser.add_argument('--check-concurrency', type=int, default=6, help="number of checks run at the same time for one token")
+    parser.add_argument('--rpc-concurrency', type=int, default=16, help="maximum checks using the Ethereum node at once")
+    parser.add_argument('--etherscan-concurrency', type=int, default=4, help="maximum checks using the Etherscan API at once")
+    parser.add_argument('--browser-concurrency', type=int, default=2, help="headless browsers in the pool, pages that need one wait for a free browser")
+    parser.add_argument('--check-timeout', type=float, help="seconds each check may run, overrides the per-check defaults")
+    parser.add_argument('--analysis-timeout', type=float, default=Orchestrator.ANALYSIS_TIMEOUT, help="seconds all checks of one token may take, including waiting for a backend, 0 for no limit")
+    parser.add_argument('--stats', action='store_true', help="print per-host request, throttling and wait statistics and per-check timeout counts and which backend served each scraped page to stderr when done")
+    parser.add_argument('--metrics', help="write counters and latency histograms when done, Prometheus text for a .prom file, otherwise a JSON line")
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'], help="profile the checks one at a time, one file per profiled check in CHECKER_PROFILE_DIR (default ./profiles)")
+    parser.add_argument('--resume', action='store_true', help="skip addresses already present in the output file and append to it")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    profile = Registry.PROFILES[args.check_profile]
+    checks = [check.strip() for check in args.checks.split(',') if check.strip()] if args.checks else profile['checks']
+    unknown = Registry.unknown(checks)
+    if unknown:
+        sys.exit(f"Unknown check(s): {', '.join(unknown)}")
+    options = profile['options']
+    unsupported = Registry.unsupported(checks, args.check_profile)
+    if unsupported:
+        sys.exit(unsupported)
+    if args.resume and args.output == '-':
+        sys.exit("--resume needs an output file")
+
+    limiter = Orchestrator.BackendLimiter({
+        'rpc': args.rpc_concurrency,
+        'etherscan': args.etherscan_concurrency,
+    })
+    if args.profile:
+        Metrics.PROFILER = args.profile
+    timeouts = {check: args.check_timeout for check in checks} if args.check_timeout else None
+    # Only the backends the selected checks use are imported, the browserless and onchain profiles never load selenium
+    browser = 'driver' in Registry.backends(checks, **options)
+    Registry.load_backends(checks, **options)
+    if browser:
+        import DriverPool
+        DriverPool.configure(size=args.browser_concurrency)
+    try:
+        Clients.ensure_connected()
+    except ConnectionError as e:
+        sys.exit(str(e))
+
+    skip = set()
+    if args.resume:
+        skip = completed_addresses(args.output)
+        trim_partial_line(args.output)
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    out = sys.stdout if args.output == '-' else open(args.output, 'a' if args.resume else 'w', encoding='utf-8')
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            pending = set()
+            for address, checksummed in unique_addresses(read_addresses(source), skip):
+                if checksummed is None:
+                    write_record(out, {'address': address, 'results': {}, 'errors': {'init': "Invalid Ethereum address."}})
+                    continue
+                pending.add(executor.submit(scan_token, checksummed, checks, limiter, args.check_concurrency, timeouts, args.analysis_timeout, options))
+                # Only keep a bounded number of tokens in flight so memory stays flat on huge inputs
+                if len(pending) >= args.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write_record(out, future.result())
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write_record(out, future.result())
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+        if browser:
+            DriverPool.shutdown()
+        if args.metrics:
+            if args.metrics.endswith('.prom'):
+                Metrics.registry.write_prometheus(args.metrics)
+            else:
+                Metrics.registry.write_jsonl(args.metrics)
+        if args.stats:
+            stats = {'hosts': RateLimiter.get_limiter().stats(), 'checks': Orchestrator.timeout_stats.stats()}
+            if 'http' in Registry.backends(checks, **options):
+                import FetchBackends
+                stats['fetch'] = FetchBackends.fetch_stats.stats()
+            print(json.dumps(stats, indent=2), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from eth_utils import keccak, function_signature_to_4byte_selector, to_checksum_address
+import Cache
+import Metrics
+
+# Bumped whenever the findings below change, so verdicts cached by older versions are analyzed again
+ANALYSIS_VERSION = 1
+
+# Owner controls that are common in scam tokens, looked up by their 4-byte selector in the dispatcher
+SUSPICIOUS_FUNCTIONS = {
+    'blacklist': ('high', "Owner can blacklist addresses", [
+        'setBlacklist(address,bool)', 'blacklist(address)', 'blacklistAddress(address,bool)', 'addBlacklist(address)',
+        'addToBlacklist(address)', 'addToBlackList(address[])', 'setBots(address[])', 'addBots(address[])',
+        'blockBots(address[])', 'setBot(address,bool)', 'setBlacklisted(address,bool)', 'manageBlacklist(address[],bool)',
+    ]),
+    'whitelist': ('medium', "Owner-managed whitelist", [
+        'setWhitelist(address,bool)', 'setWhitelist(address[],bool)', 'addToWhitelist(address)', 'addWhitelist(address)',
+        'setWhitelisted(address,bool)',
+    ]),
+    'mint': ('high', "Tokens can be minted after deployment", [
+        'mint(address,uint256)', 'mint(uint256)', 'mintTo(address,uint256)',
+    ]),
+    'fee-setter': ('medium', "Owner can change buy or sell fees", [
+        'setFee(uint256)', 'setFees(uint256,uint256)', 'setTaxFeePercent(uint256)', 'setBuyFee(uint256)', 'setSellFee(uint256)',
+        'setBuyFees(uint256,uint256)', 'setSellFees(uint256,uint256)', 'updateFees(uint256,uint256)', 'setTax(uint256)',
+        'setTaxes(uint256,uint256)', 'updateBuyFees(uint256,uint256,uint256)', 'updateSellFees(uint256,uint256,uint256)',
+    ]),
+    'max-tx': ('low', "Owner can limit transaction size", [
+        'setMaxTxAmount(uint256)', 'setMaxTxPercent(uint256)', 'setMaxWalletSize(uint256)', 'setMaxWallet(uint256)',
+    ]),
+    'trading-switch': ('medium', "Owner can turn trading on and off", [
+        'setTradingEnabled(bool)', 'setTrading(bool)', 'enableTrading(bool)', 'pause()',
+    ]),
+}
+
+# Selector -> (finding id, signature), computed once at import
+SELECTORS = {int.from_bytes(function_signature_to_4byte_selector(signature), 'big'): (finding, signature)
+             for finding, (_, _, signatures) in SUSPICIOUS_FUNCTIONS.items() for signature in signatures}
+
+SELFDESTRUCT = 0xff
+DELEGATECALL = 0xf4
+PUSH1 = 0x60
+PUSH32 = 0x7f
+
+# EIP-1167 minimal proxy, the 20 bytes between prefix and suffix are the implementation address
+MINIMAL_PROXY_PREFIX = bytes.fromhex('363d3d373d3d3d363d73')
+MINIMAL_PROXY_SUFFIX = bytes.fromhex('5af43d82803e903d91602b57fd5bf3')
+
+# Used for the web3 contract instance when the contract is not verified on Etherscan
+ERC20_ABI = [
+    {'name': 'name', 'type': 'function', 'stateMutability': 'view', 'inputs': [], 'outputs': [{'name': '', 'type': 'string'}]},
+    {'name': 'symbol', 'type': 'function', 'stateMutability': 'view', 'inputs': [], 'outputs': [{'name': '', 'type': 'string'}]},
+    {'name': 'decimals', 'type': 'function', 'stateMutability': 'view', 'inputs': [], 'outputs': [{'name': '', 'type': 'uint8'}]},
+    {'name': 'totalSupply', 'type': 'function', 'stateMutability': 'view', 'inputs': [], 'outputs': [{'name': '', 'type': 'uint256'}]},
+    {'name': 'balanceOf', 'type': 'function', 'stateMutability': 'view', 'inputs': [{'name': 'account', 'type': 'address'}], 'outputs': [{'name': '', 'type': 'uint256'}]},
+    {'name': 'owner', 'type': 'function', 'stateMutability': 'view', 'inputs': [], 'outputs': [{'name': '', 'type': 'address'}]},
+]
+
+# Returns the implementation address if the code is an EIP-1167 minimal proxy, otherwise None
+def minimal_proxy_target(code):
+    if len(code) == 45 and code.startswith(MINIMAL_PROXY_PREFIX) and code.endswith(MINIMAL_PROXY_SUFFIX):
+        return to_checksum_address(code[10:30])
+    return None
+
+# Drops the CBOR metadata solc appends after the code, its bytes are not instructions
+def strip_metadata(code):
+    if len(code) < 2:
+        return code
+    length = int.from_bytes(code[-2:], 'big')
+    if 0 < length <= len(code) - 2 and code[-length - 2] in (0xa1, 0xa2):
+        return code[:-length - 2]
+    return code
+
+# Walks the code once, skipping PUSH data, and returns (pushed selectors, opcodes seen)
+def scan_opcodes(code):
+    selectors = set()
+    opcodes = set()
+    i = 0
+    end = len(code)
+    while i < end:
+        opcode = code[i]
+        if PUSH1 <= opcode <= PUSH32:
+            size = opcode - PUSH1 + 1
+            # solc pushes selectors with leading zero bytes as PUSH3
+            if size in (3, 4):
+                selectors.add(int.from_bytes(code[i + 1:i + 1 + size], 'big'))
+            i += size + 1
+            continue
+        opcodes.add(opcode)
+        i += 1
+    return selectors, opcodes
+
+# Analyzes runtime code and returns a verdict dict with the findings, proxies are reported with their implementation
+@Metrics.timed('bytecode_analysis')
+def analyze(code):
+    verdict = {'size': len(code), 'proxy': minimal_proxy_target(code), 'findings': []}
+    if not code:
+        return verdict
+    selectors, opcodes = scan_opcodes(strip_metadata(code))
+    seen = set()
+    for selector in sorted(selectors & SELECTORS.keys()):
+        finding, signature = SELECTORS[selector]
+        if finding not in seen:
+            seen.add(finding)
+            severity, description, _ = SUSPICIOUS_FUNCTIONS[finding]
+            verdict['findings'].append({'id': finding, 'signature': signature, 'severity': severity, 'description': description})
+    if SELFDESTRUCT in opcodes:
+        verdict['findings'].append({'id': 'selfdestruct', 'signature': 'SELFDESTRUCT', 'severity': 'high', 'description': "Contract can destroy itself"})
+    if DELEGATECALL in opcodes and verdict['proxy'] is None:
+        verdict['findings'].append({'id': 'delegatecall', 'signature': 'DELEGATECALL', 'severity': 'medium', 'description': "Runs code from another contract, its behaviour can change"})
+    return verdict
+
+# This class answers bytecode analysis by code hash, byte-identical clones are only analyzed once
+class BytecodeAnalyzer():
+    def __init__(self, client, path=Cache.DEFAULT_PATH):
+        self.client = client
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS code_verdicts (
+            code_hash TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            verdict TEXT NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (code_hash, version))""")
+        self.db.commit()
+
+    def get_code(self, address):
+        code = self.client.call('eth_getCode', [address, 'latest']) or '0x'
+        return bytes.fromhex(code[2:])
+
+    def lookup(self, code_hash):
+        with self.lock:
+            row = self.db.execute("SELECT verdict FROM code_verdicts WHERE code_hash = ? AND version = ?", (code_hash, ANALYSIS_VERSION)).fetchone()
+            if row is None:
+                self.misses += 1
+                Metrics.count('cache_requests_total', kind='bytecode', result='miss')
+                return None
+            self.db.execute("UPDATE code_verdicts SET last_used = ? WHERE code_hash = ? AND version = ?", (time.time(), code_hash, ANALYSIS_VERSION))
+            self.db.commit()
+            self.hits += 1
+        Metrics.count('cache_requests_total', kind='bytecode', result='hit')
+        return json.loads(row[0])
+
+    def store(self, code_hash, verdict):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO code_verdicts VALUES (?, ?, ?, ?)", (code_hash, ANALYSIS_VERSION, json.dumps(verdict), time.time()))
+            self.db.commit()
+
+    # Fetches the code at an address and returns its verdict, from the cache when the same code was seen before
+    def analyze_address(self, address):
+        code = self.get_code(address)
+        code_hash = '0x' + keccak(code).hex()
+        verdict = self.lookup(code_hash)
+        if verdict is None:
+            verdict = analyze(code)
+            # A minimal proxy has no logic of its own, so the findings come from its implementation
+            if verdict['proxy']:
+                implementation = analyze(self.get_code(verdict['proxy']))
+                verdict['findings'] = implementation['findings']
+            self.store(code_hash, verdict)
+        verdict['code_hash'] = code_hash
+        return verdict
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+# Returns the process-wide analyzer, sharing the cache database file
+def get_analyzer(client):
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = BytecodeAnalyzer(client, path=os.getenv('CHECKER_CACHE_PATH', Cache.DEFAULT_PATH))
+        return _analyzer
@@ -0,0 +1,84 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import Metrics
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "crypto-token-checker", "cache.sqlite3")
+
+# This class is a small SQLite cache for Etherscan lookups keyed by chain, address and kind (abi, source, ...)
+class EtherscanCache():
+    def __init__(self, path=DEFAULT_PATH, ttl=7 * 24 * 3600, negative_ttl=3600, max_entries=50000):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS entries (
+            chain INTEGER NOT NULL,
+            address TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            value TEXT,
+            negative INTEGER NOT NULL,
+            expires REAL NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (chain, address, kind))""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self.db.commit()
+
+    # Returns (found, value), value is None for a cached negative result such as "not verified"
+    def get(self, chain, address, kind):
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT value, negative, expires FROM entries WHERE chain = ? AND address = ? AND kind = ?", (chain, address.lower(), kind)).fetchone()
+            if row is None or row[2] < now:
+                self.misses += 1
+                Metrics.count('cache_requests_total', kind=kind, result='miss')
+                return False, None
+            self.db.execute("UPDATE entries SET last_used = ? WHERE chain = ? AND address = ? AND kind = ?", (now, chain, address.lower(), kind))
+            self.db.commit()
+            self.hits += 1
+        Metrics.count('cache_requests_total', kind=kind, result='hit')
+        value, negative, _ = row
+        return True, (None if negative else json.loads(value))
+
+    # Stores a value, negative results expire after the shorter negative_ttl
+    def set(self, chain, address, kind, value, negative=False):
+        now = time.time()
+        expires = now + (self.negative_ttl if negative else self.ttl)
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", (chain, address.lower(), kind, None if negative else json.dumps(value), int(negative), expires, now))
+            self.evict()
+            self.db.commit()
+
+    # Removes expired entries and then the least recently used ones above max_entries
+    def evict(self):
+        self.db.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+        count = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        if count > self.max_entries:
+            self.db.execute("DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries ORDER BY last_used LIMIT ?)", (count - self.max_entries,))
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Returns the process-wide cache, its location and limits can be set through environment variables
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EtherscanCache(
+                path=os.getenv('CHECKER_CACHE_PATH', DEFAULT_PATH),
+                ttl=float(os.getenv('CHECKER_CACHE_TTL', 7 * 24 * 3600)),
+                negative_ttl=float(os.getenv('CHECKER_CACHE_NEGATIVE_TTL', 3600)),
+                max_entries=int(os.getenv('CHECKER_CACHE_MAX_ENTRIES', 50000)))
+        return _cache
@@ -1,90 +1,145 @@
 import json
-import re
-import requests
 import os
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
-from web3 import Web3
-from web3.exceptions import BadFunctionCallOutput
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.chrome.options import Options
-import time
-from datetime import datetime
-from uniswap import Uniswap
-from web3.middleware import geth_poa_middleware
-from collections import defaultdict
-import random
-from decimal import Decimal
+from eth_utils import to_checksum_address
+import Cache
+import RuleEngine
+import HolderIndex
+import Clients
+import RateLimiter
+import Multicall
+import Bytecode
+import Metrics
+import threading
+from functools import cached_property
+
 load_dotenv()
 
+# Chain id used to key cached Etherscan lookups
+CHAIN_ID = 1
+
+# Transfers read per holders check before falling back to scraping, indexing continues from the checkpoint next time
+HOLDER_INDEX_MAX_LOGS = int(os.getenv('HOLDER_INDEX_MAX_LOGS', 200000))
+
+# Sites the checks talk to, overridable so the checks can run against local stand-ins
+ETHERSCAN_API_URL = os.getenv('ETHERSCAN_API_URL', "https://api.etherscan.io/api")
+ETHERSCAN_URL = os.getenv('ETHERSCAN_URL', "https://etherscan.io")
+HONEYPOT_URL = os.getenv('HONEYPOT_URL', "https://honeypot.is")
+HONEYPOT_API_URL = os.getenv('HONEYPOT_API_URL', "https://api.honeypot.is")
+DEXTOOLS_URL = os.getenv('DEXTOOLS_URL', "https://www.dextools.io")
+
+# Scrape dextools when a token has no Uniswap V2 WETH pair, set MARKET_DEXTOOLS_FALLBACK=0 to disable
+DEXTOOLS_FALLBACK = os.getenv('MARKET_DEXTOOLS_FALLBACK', '1') != '0'
+
+# Values the honeypot check needs, a page or reply without all of them is not used
+HONEYPOT_LABELS = ("Buy Tax", "Sell Tax", "Can't sell", "Siphoned")
+
+# Raised when Etherscan could not be asked for a contract's source, as opposed to a contract that is not verified
+class SourceUnavailable(Exception):
+    pass
+
+# Market check result for an entry of MarketInfo.market_info, shared with the watchlist which reads many tokens at once
+def format_market_info(info):
+    if not info or not info['liquidity_usd']:
+        return f"Market information is N/A\nCould indicate a SCAM"
+    return f"Liquidity: ${info['liquidity_usd']:,.0f} --- Market Cap: ${info['fdv_usd']:,.0f} --- Price: ${info['price_usd']:.6g}"
+
 # This class is used for analyzing ERC-20 Tokens for potential scam patterns
+# Scraped pages are fetched over plain HTTP first, use_browser=False never loads one in a browser and scrape=False never scrapes at all
 class ERC20Checker():
-    def __init__(self, contract_address):
+    def __init__(self, contract_address, use_browser=True, scrape=True):
         # Retrieving API keys from environment variables
         self.infura_key = os.getenv('INFURA_API_KEY')
         self.etherscan_key = os.getenv('ETHERSCAN_API_KEY')
 
-        # Ethereum address used for Uniswap
-        ETHEREUM_ADDRESS = '0x9c0Ad4EBf1605EC9229d804215c2231df13cE408'
-
-        # Establishing connection with Ethereum node
-        self.w3 = Web3(Web3.HTTPProvider(f"https://mainnet.infura.io/v3/{self.infura_key}"))
+        # Ethereum node endpoint, ETH_RPC_URL can point the checker at another node
+        self.rpc_url = Clients.rpc_url()
 
-        # Check if connection is established
-        if not self.w3.is_connected():
-            raise ConnectionError("Failed to connect to Ethereum node.")
-
-        # Convert the address to its checksummed version
+        # Convert the address to its checksummed version, this needs no connection to the node
         try:
-            self.contract_address = self.w3.to_checksum_address(contract_address)
+            self.contract_address = to_checksum_address(contract_address)
         except ValueError as e:
             raise ValueError("Invalid Ethereum address.") from e
-        
-        # Attempt to create a contract and Uniswap instance
-        try: 
-            self.contract = self.w3.eth.contract(address=self.contract_address, abi=self.get_contract_abi())
-            self.uniswap = Uniswap(ETHEREUM_ADDRESS, None, version=2, provider=f"https://mainnet.infura.io/v3/{self.infura_key}")
-        except Exception as e:
-            return e
+        self.use_browser = use_browser
+        self.scrape = scrape
+        # Backend that served each check's result, e.g. 'http' or 'browser' for a scraped page
+        self.served_by = {}
+
+        # Token reads (name, owner, ...) are fetched together in one batched call the first time a check needs them
+        self.rpc = Clients.get_rpc()
+        self._token_info = None
+        self._token_info_lock = threading.Lock()
+
+        # The ABI and contract are only built when a check first uses them
+        self._abi_lock = threading.Lock()
+
+    # Pings the Ethereum node, once per process, raising ConnectionError if it cannot be reached
+    def ensure_connected(self):
+        Clients.ensure_connected()
+
+    # Shared Web3 client with a pooled keep-alive HTTP session
+    @property
+    def w3(self):
+        return Clients.get_web3()
+
+    # Contract ABI, fetched the first time it is needed
+    @property
+    def abi(self):
+        with self._abi_lock:
+            if not hasattr(self, '_abi'):
+                self._abi = self.get_contract_abi()
+            return self._abi
+
+    # Web3 contract instance, an unverified contract gets a minimal ERC-20 ABI
+    @cached_property
+    def contract(self):
+        return self.w3.eth.contract(address=self.contract_address, abi=self.abi or Bytecode.ERC20_ABI)
+
+    # Reads name, symbol, decimals, totalSupply, owner and getOwner in a single Multicall3 round trip
+    def token_info(self):
+        with self._token_info_lock:
+            if self._token_info is None:
+                self._token_info = Multicall.BatchReader(self.rpc).read_tokens([self.contract_address])[self.contract_address]
+            return self._token_info
 
     # Retrieves the name of the Token through a contract call    
     def get_name(self):
         try:
-            name = self.contract.functions.name().call()
+            name = self.token_info()['name']
+            if not name.success:
+                raise Exception(name.error)
+            name = name.value
         except:
             # Fallback to 'Unknown' if 'name' function is not found
             name = 'Unknown Name'
         return name
 
-    # Retrieves the contract abi through etherscan API    
+    # Retrieves the contract abi, from the local cache or through the etherscan API
     def get_contract_abi(self):
-        try:
-            etherscan_url = f"https://api.etherscan.io/api?module=contract&action=getabi&address={self.contract_address}&apikey={self.etherscan_key}"
-            response = requests.get(etherscan_url)
-
-            if response.status_code != 200:
-                raise Exception("Failed to fetch contract ABI from Etherscan")
-
-            data = response.json()
-
-            if data['status'] != '1':
-                raise Exception("Error fetching contract ABI from Etherscan")
+        found, abi = Cache.get_cache().get(CHAIN_ID, self.contract_address, 'abi')
+        if not found:
+            try:
+                abi = self.fetch_contract_info().get('abi')
+            except SourceUnavailable:
+                # The contract falls back to the minimal ERC-20 ABI until Etherscan answers
+                abi = None
+        return abi if abi else False
 
-            return json.loads(data['result'])
-        
-        except:
-            return False
-        
-    # Retrieves the contract source code through etherscan API
+    # Retrieves the contract source code, from the local cache or through the etherscan API
+    # Returns None for a contract that is not verified and raises SourceUnavailable when Etherscan could not be asked
     def get_contract_source_code(self):
+        found, source_code = Cache.get_cache().get(CHAIN_ID, self.contract_address, 'source')
+        if not found:
+            source_code = self.fetch_contract_info().get('source')
+        return source_code
+
+    # Fetches verified source code and ABI in one etherscan call and caches both, unverified contracts are cached as negative results
+    # A failed lookup raises SourceUnavailable, so it is not mistaken for an unverified contract
+    def fetch_contract_info(self):
         try:
-            etherscan_url = f"https://api.etherscan.io/api?module=contract&action=getsourcecode&address={self.contract_address}&apikey={self.etherscan_key}"
-            response = requests.get(etherscan_url)
+            etherscan_url = f"{ETHERSCAN_API_URL}?module=contract&action=getsourcecode&address={self.contract_address}&apikey={self.etherscan_key}"
+            Metrics.count('etherscan_calls_total', action='getsourcecode')
+            response = Clients.get_session().get(etherscan_url, timeout=30)
 
             if response.status_code != 200:
                 raise Exception("Failed to fetch contract source code from Etherscan")
@@ -92,85 +147,98 @@ class ERC20Checker():
             data = response.json()
 
             if data['status'] != '1':
+                if 'rate limit' in str(data.get('result', '')).lower():
+                    RateLimiter.get_limiter().throttled(etherscan_url)
                 raise Exception("Error fetching contract source code from Etherscan")
 
-            return data['result'][0]['SourceCode']
-        except:
-            pass
+            result = data['result'][0]
+        except Exception as e:
+            # Errors such as rate limiting are not cached so the next check tries again
+            raise SourceUnavailable(f"Could not fetch the source code of {self.contract_address} from Etherscan") from e
+
+        cache = Cache.get_cache()
+        if not result.get('SourceCode'):
+            cache.set(CHAIN_ID, self.contract_address, 'source', None, negative=True)
+            cache.set(CHAIN_ID, self.contract_address, 'abi', None, negative=True)
+            return {}
+
+        try:
+            abi = json.loads(result['ABI'])
+        except (KeyError, ValueError):
+            abi = None
+        cache.set(CHAIN_ID, self.contract_address, 'source', result['SourceCode'])
+        cache.set(CHAIN_ID, self.contract_address, 'abi', abi, negative=abi is None)
+        return {'source': result['SourceCode'], 'abi': abi}
     
     # Parses the contract source code for common scam patterns 
     def check_scam_patterns(self):
-        source_code = self.get_contract_source_code()
-        # scam indicators in contract source code
-        scam_patterns = [
-            r"address public _Owner = 0x",
-            r"swapAndLiquifyEnabled",
-            r"function burn(uint256 value) external onlyOwner",
-            r"address public constant router = 0x",
-            r"bytes32 accountHash = 0x",
-            r"setWhitelist",
-            r"_user_"
-        ]
+        try:
+            source_code = self.get_contract_source_code()
+        except SourceUnavailable:
+            return "Could not fetch the contract source code from Etherscan, try again later"
+        if not source_code:
+            return self.check_bytecode()
+        # scam indicators in contract source code, loaded from scam_rules.json
+        hits = RuleEngine.default_rules().scan(source_code)
         warnings = []
-        for pattern in scam_patterns:
-            if re.search(pattern, source_code):
-                warnings.append(f"Suspicious pattern found: {pattern}, likely a SCAM")
+        reported = set()
+        for hit in hits:
+            if hit.rule.id not in reported:
+                reported.add(hit.rule.id)
+                warnings.append(f"Suspicious pattern found: {hit.rule.pattern} ({hit.file}:{hit.line}), likely a SCAM")
         if warnings:
             return warnings
-        if len(source_code) < 4000:
+        if sum(len(content) for _, content in RuleEngine.split_sources(source_code)) < 4000:
             warning = "Contract is very short, may indicate a SCAM if ownership is not renounced"
             return warning
         else:
             warning = "Source Code is Clean\nSafe✓"
             return warning
 
-    # Utalizes webscraping to get buy, sell, cant sell and siphoned values of the token
+    # Scans the deployed bytecode of an unverified contract for suspicious functions and opcodes
+    def check_bytecode(self):
+        warnings = ["Contract source code is not verified, may indicate a SCAM"]
+        try:
+            verdict = Bytecode.get_analyzer(self.rpc).analyze_address(self.contract_address)
+        except Exception:
+            return warnings[0]
+        if verdict['proxy']:
+            warnings.append(f"Contract is a minimal proxy for {verdict['proxy']}")
+        for finding in verdict['findings']:
+            warnings.append(f"Suspicious bytecode found: {finding['signature']} ({finding['description']}), likely a SCAM")
+        return warnings if len(warnings) > 1 else warnings[0]
+
+    # Reads a scraped page through FetchBackends, recording which backend served the check
+    def fetch(self, check, target):
+        import FetchBackends
+        values, backend = FetchBackends.fetch(target, use_browser=self.use_browser)
+        self.served_by[check] = backend
+        return values
+
+    # Gets buy, sell, cant sell and siphoned values of the token from honeypot.is, the rendered page is only loaded if its JSON fails
     def scrape_honeypot(self):
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--log-level=3")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/64.0.3282.140 Safari/537.36 Edge/17.17134")
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.get(f"https://honeypot.is/ethereum?address={self.contract_address}")
-        time.sleep(2)
-        soup = BeautifulSoup(driver.page_source, "lxml")
+        if not self.scrape:
+            return "Honeypot check skipped, scraping is turned off"
+        import Extractors
+        import FetchBackends
+        target = FetchBackends.Target('honeypot',
+            f"{HONEYPOT_API_URL}/v2/IsHoneypot?address={self.contract_address}", Extractors.parse_honeypot_api,
+            f"{HONEYPOT_URL}/ethereum?address={self.contract_address}", Extractors.parse_honeypot,
+            usable=lambda values: all(values.get(label) for label in HONEYPOT_LABELS),
+            ready=[('xpath', Extractors.READY['honeypot'])])
+        try:
+            values = self.fetch('scrape_honeypot', target)
+        except FetchBackends.FetchError:
+            # Reported as undetermined taxes below
+            values = {}
         results = {}
 
         try:
-            buy_tax = None
-            sell_tax = None
+            buy_tax = values.get("Buy Tax")
+            sell_tax = values.get("Sell Tax")
+            cant_sell = values.get("Can't sell")
+            siphoned = values.get("Siphoned")
 
-            tax_div = soup.find('div', class_='grid grid-cols-[1fr_1fr] gap-0 md:grid-cols-[1fr_1fr_1.5fr]')
-            if tax_div:
-                taxes_selector = tax_div.find_all('li')
-            else:
-                taxes_selector = soup.find_all('li')
-
-            for tax_selector in taxes_selector:
-                tax_div = tax_selector.find('h4', class_='font-bebasNeue text-xl uppercase text-lightGreen')
-                if tax_div:
-                    tax_div_text = tax_div.get_text().strip()
-                    if tax_div_text == "Buy Tax":
-                        buy_tax = tax_selector.find('p', class_='font-bebasNeue text-2xl uppercase leading-none text-white').get_text().strip()
-                    if tax_div_text == "Sell Tax":
-                        sell_tax = tax_selector.find('p', class_='font-bebasNeue text-2xl uppercase leading-none text-white').get_text().strip()
-
-            holder_div = soup.find_all('div', class_='grid grid-cols-[1fr_1fr] gap-0 md:grid-cols-[1fr_1fr_1.5fr]')[1]
-            if holder_div:
-                holders_selector = holder_div.find_all('li')
-            else:
-                holders_selector = soup.find_all('li')
-
-            for holder_selector in holders_selector:
-                holder_div = holder_selector.find('h4', class_='font-bebasNeue text-xl uppercase text-lightGreen')
-                if holder_div:
-                    holder_div_text = holder_div.get_text().strip()
-                    if holder_div_text == "Can't sell":
-                        cant_sell = holder_selector.find('p', class_='font-bebasNeue text-2xl uppercase leading-none text-white').get_text().strip()
-                    if holder_div_text == "Siphoned":
-                        siphoned = holder_selector.find('p', class_='font-bebasNeue text-2xl uppercase leading-none text-white').get_text().strip()
-      
             if buy_tax and sell_tax and cant_sell and siphoned:
                 buy_tax_float = float(buy_tax.rstrip('%'))
                 sell_tax_float = float(sell_tax.rstrip('%'))
@@ -198,20 +266,21 @@ class ERC20Checker():
                 return "Warning! Could not determine taxes, Token is likely a scam"
         except:
             return "Warning! Could not determine taxes, Token is likely a scam"
-        finally:
-            driver.quit()
 
     # Performs a contract call of owner function to get the current contract owner
     def is_ownership_renounced_or_no_owner(self):                           
         try:
-            owner_address = self.contract.functions.owner().call()
+            info = self.token_info()
         except:
+            info = {}
+        owner = info.get('owner')
+        if not owner or not owner.success:
             # Fallback to 'getOwner' if 'owner' function is not found
-            try:
-                owner_address = self.contract.functions.getOwner().call()
-            except:
-                owner_address = "Could not determine owner"
-                return owner_address
+            owner = info.get('getOwner')
+        if not owner or not owner.success:
+            owner_address = "Could not determine owner"
+            return owner_address
+        owner_address = owner.value
 
         if owner_address == '0x0000000000000000000000000000000000000000' or owner_address == '0x000000000000000000000000000000000000dEaD':
             return owner_address +"\nSafe✓"
@@ -219,88 +288,84 @@ class ERC20Checker():
             owner = ("Ownership NOT Renounced\n" + "Owner: " + owner_address)
             return owner
         
-    # Retrieves top token holders (1-10) through webscraping of Etherscan website
+    # Retrieves top token holders (1-10) from the local Transfer-event index, scraping Etherscan only if indexing fails
     def get_top_holders(self, top=10):
-        etherscan_url = f"https://etherscan.io/token/{self.contract_address}#balances"
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--log-level=3")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/64.0.3282.140 Safari/537.36 Edge/17.17134")
-        driver = webdriver.Chrome(options=chrome_options)
+        try:
+            total_supply = self.token_info()['totalSupply']
+            total_supply = total_supply.value if total_supply.success else None
+            with Metrics.span('holder_index'):
+                summary = HolderIndex.get_indexer(self.rpc).summary(self.contract_address, top, total_supply, max_logs=HOLDER_INDEX_MAX_LOGS)
+            if not summary['rows']:
+                raise Exception("No holders found in Transfer logs")
+        except Exception:
+            if not self.scrape:
+                return f"failed to get top holders"
+            return self.get_top_holders_scraped(top)
+        self.served_by['get_top_holders'] = 'holder_index'
+        concentration = f"Top {len(summary['rows'])} hold {summary['top_share'] * 100:.2f}% --- Gini {summary['gini']:.2f} --- HHI {summary['hhi']:.3f}"
+        return HolderIndex.format_top_holders(summary['rows']) + "\n" + concentration
+
+    # Retrieves top token holders (1-10) from Etherscan, the holders table is fetched on its own and the token page is only rendered if that fails
+    def get_top_holders_scraped(self, top=10):
+        import Extractors
+        import FetchBackends
+        parse = lambda page_source: Extractors.parse_holders(page_source, top)
+        target = FetchBackends.Target('holders',
+            f"{ETHERSCAN_URL}/token/generic-tokenholders2?m=normal&a={self.contract_address}&p=1", parse,
+            f"{ETHERSCAN_URL}/token/{self.contract_address}#balances", parse,
+            usable=bool,
+            # The browser waits for the holders iframe, switches into it and waits for the table rows
+            ready=[('frame', Extractors.READY['holders_frame']), ('xpath', Extractors.READY['holders'])],
+            partial=False)
 
         try:
-            time.sleep(random.uniform(5, 10))  # Added delay before making a request
-            driver.get(etherscan_url)
-            time.sleep(3)
-            driver.switch_to.frame("tokeholdersiframe")
-            top_holders = []
-            percentage_counts = {}  # Dictionary to count individual holders with same percentage
-
-            for row in range(1, top + 1):
-                rank = driver.find_element(By.XPATH, f'//*[@id="maintable"]/div[2]/table/tbody/tr[{row}]/td[1]').text
-                try: 
-                    address = driver.find_element(By.XPATH, f'//*[@id="maintable"]/div[2]/table/tbody/tr[{row}]/td[2]/div/a').get_attribute("data-clipboard-text").strip()
-                except:
-                    address = driver.find_element(By.XPATH, f'//*[@id="maintable"]/div[2]/table/tbody/tr[{row}]/td[2]/div/a[2]').get_attribute("data-clipboard-text").strip()
-
-                percentage = driver.find_element(By.XPATH, f'//*[@id="maintable"]/div[2]/table/tbody/tr[{row}]/td[4]').text.strip('%')
-                if address.startswith('0x00000000000000000000000000000000000'):
-                    type = "Burn Address"
+            rows = self.fetch('get_top_holders', target)
+            if not rows:
+                raise Exception("Holders table is empty")
+
+            for row in rows:
+                if not row['address']:
+                    raise Exception(f"Could not read the address of holder {row['rank']}")
+                if row['address'].startswith('0x00000000000000000000000000000000000'):
+                    row['type'] = "Burn Address"
                 else:
-                    try:
-                        type = driver.find_element(By.XPATH, f'//*[@id="maintable"]/div[2]/table/tbody/tr[{row}]/td[2]/div/i').get_attribute("aria-label").strip()
-                    except:
-                        try:
-                            type = driver.find_element(By.XPATH, f'//*[@id="maintable"]/div[2]/table/tbody/tr[{row}]/td[2]/div/span/i').get_attribute("aria-label").strip()
-                        except:
-                            type = "individual"
-                
-                # Check the count of individuals with the same percentage
-                if type == "individual":
-                    if percentage in percentage_counts:
-                        percentage_counts[percentage] += 1
-                        if percentage_counts[percentage] > 2:
-                            raise Exception(f"More than 3 individuals with same percentage ({percentage}%) found")
-                    else:
-                        percentage_counts[percentage] = 1
-                top_holders.append(f"{rank} --- {address} --- {float(percentage)}% --- {type}")
-
-            return "\n".join(top_holders)
+                    row['type'] = row['type'] or "individual"
+
+            return HolderIndex.format_top_holders(rows)
 
         except Exception as e:
-            top_holders = []
             return f"failed to get top holders"
 
-        finally:
-            driver.quit()
+    # Computes liquidity, price and market cap on-chain from the token's Uniswap V2 WETH pair, dextools is only a fallback
+    def market_cap(self):
+        # MarketInfo pulls in numpy, so it is only imported by this check
+        import MarketInfo
+        try:
+            with Metrics.span('market_onchain'):
+                info = MarketInfo.market_info(Multicall.BatchReader(self.rpc), [self.contract_address])[self.contract_address]
+        except Exception:
+            info = None
+        if info is None and DEXTOOLS_FALLBACK and self.scrape:
+            return self.market_cap_scraped()
+        self.served_by['market_cap'] = 'onchain'
+        return format_market_info(info)
 
     # Performs webscraping of Dextools.io for data such as market cap, liquidity, 24hr percent change
-    def market_cap(self):
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--log-level=3")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/64.0.3282.140 Safari/537.36 Edge/17.17134")
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.get(f"https://www.dextools.io/app/en/ether/pair-explorer/{self.contract_address}")
-        wait = WebDriverWait(driver, 10)  # wait up to 10 seconds
-        time.sleep(2)
-        wait.until(EC.presence_of_element_located((By.CLASS_NAME, 'value')))
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        percentage = soup.find('span', class_='buy-color ng-star-inserted').get_text().strip()
-        if percentage == 'buy':
-            percentage = soup.find('span', class_='sell-color ng-star-inserted').get_text().strip()
-        labels = soup.find_all('label')
-        liquidity = None
-        market_cap_value = None
-        for label in labels:
-            if 'Liquidity:' in label.text:
-                liquidity = label.find_next_sibling('span').text
-            if 'TMCap:' in label.text:
-                market_cap_value = label.find_next_sibling('span').text
-    
-        driver.quit()
+    def market_cap_scraped(self):
+        import Extractors
+        import FetchBackends
+        url = f"{DEXTOOLS_URL}/app/en/ether/pair-explorer/{self.contract_address}"
+        target = FetchBackends.Target('dextools', url, Extractors.parse_dextools, url, Extractors.parse_dextools,
+            usable=lambda values: bool(values.get('liquidity') or values.get('market_cap')),
+            ready=[('class', Extractors.READY['dextools'])])
+        try:
+            values = self.fetch('market_cap', target)
+        except FetchBackends.FetchError:
+            return f"Market information is N/A\nCould indicate a SCAM"
+        percentage = values.get('change')
+        liquidity = values.get('liquidity')
+        market_cap_value = values.get('market_cap')
+
         if not liquidity and not market_cap_value:
             return f"Market information is N/A\nCould indicate a SCAM"
         elif not market_cap_value:
@@ -0,0 +1,96 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import RateLimiter
+import Rpc
+import Deadline
+import Metrics
+
+# Connection pool size per host, enough for the checks of several tokens running at once
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 32))
+
+_lock = threading.Lock()
+_session = None
+_web3 = None
+_rpc = None
+_connected = False
+
+# Ethereum node endpoint, ETH_RPC_URL can point every client at another node
+def rpc_url():
+    return os.getenv('ETH_RPC_URL', f"https://mainnet.infura.io/v3/{os.getenv('INFURA_API_KEY')}")
+
+# Session that waits for the host's rate limit budget before each request and reports throttling back to the limiter
+# A 429 is retried here rather than in urllib3, so the limiter slows the host down and applies Retry-After to every request
+# Inside a check the request timeout is cut down to the time the check has left
+class RateLimitedSession(requests.Session):
+    def __init__(self, limiter=None, throttle_retries=3):
+        super().__init__()
+        self.limiter = limiter or RateLimiter.get_limiter()
+        self.throttle_retries = throttle_retries
+
+    def request(self, method, url, *args, **kwargs):
+        host = RateLimiter.host_of(url)
+        for attempt in range(self.throttle_retries + 1):
+            Metrics.observe('rate_limit_wait_seconds', self.limiter.acquire(url), host=host)
+            if Deadline.current() is not None:
+                kwargs['timeout'] = Deadline.timeout(kwargs.get('timeout'))
+            with Metrics.span('http_request', host=host):
+                response = super().request(method, url, *args, **kwargs)
+            Metrics.count('http_responses_total', host=host, status=response.status_code)
+            if response.status_code != 429:
+                self.limiter.succeeded(url)
+                return response
+            retry_after = response.headers.get('Retry-After')
+            self.limiter.throttled(url, float(retry_after) if retry_after and retry_after.isdigit() else None)
+        return response
+
+# Builds a session with keep-alive connection pools and retry with backoff on server errors
+# urllib3 would also retry a 429 that carries Retry-After, so the header is left to the rate limiter and the session retries throttling
+def make_session(pool_size=POOL_SIZE, retries=3, backoff=0.5):
+    session = RateLimitedSession(throttle_retries=retries)
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(500, 502, 503, 504), allowed_methods=frozenset(['GET', 'POST']), respect_retry_after_header=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# Returns the process-wide HTTP session shared by every Etherscan, RPC and web3 request
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+# Returns the process-wide Web3 client, created on first use, web3 is slow to import and most checks never need it
+def get_web3():
+    global _web3
+    from web3 import Web3
+    session = get_session()
+    with _lock:
+        if _web3 is None:
+            _web3 = Web3(Web3.HTTPProvider(rpc_url(), session=session))
+        return _web3
+
+# Returns the process-wide JSON-RPC client used for batched reads
+def get_rpc():
+    global _rpc
+    session = get_session()
+    with _lock:
+        if _rpc is None:
+            _rpc = Rpc.JsonRpcClient(rpc_url(), session=session)
+        return _rpc
+
+# Pings the node once per process, raising ConnectionError if it cannot be reached
+def ensure_connected():
+    global _connected
+    if _connected:
+        return
+    # Same probe as web3's is_connected, sent through the plain JSON-RPC client so web3 is not imported for it
+    try:
+        get_rpc().call('web3_clientVersion')
+    except Exception as e:
+        raise ConnectionError("Failed to connect to Ethereum node.") from e
+    _connected = True
@@ -0,0 +1,262 @@
+import argparse
+import itertools
+import json
+import os
+import queue
+import select
+import socket
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from eth_utils import to_checksum_address
+import Checker
+import Clients
+import Metrics
+import Orchestrator
+import Registry
+
+HOST = '127.0.0.1'
+PORT = int(os.getenv('CHECKER_DAEMON_PORT', 8765))
+
+# Lower runs first, the GUI asks for interactive and bulk clients can ask for bulk
+PRIORITIES = {'interactive': 0, 'normal': 5, 'bulk': 10}
+
+# One analysis of a token, shared by every client that asks for the same address and checks while it runs
+class Job():
+    def __init__(self, address, checks, priority, options=None):
+        self.address = address
+        self.checks = checks
+        self.priority = priority
+        self.options = options or {}
+        self.events = []
+        self.done = False
+        self.started = False
+        self.subscribers = 0
+        self.orchestrator = None
+        self.condition = threading.Condition()
+
+    def publish(self, event):
+        with self.condition:
+            self.events.append(event)
+            self.condition.notify_all()
+
+    def finish(self, event):
+        with self.condition:
+            self.events.append(event)
+            self.done = True
+            self.condition.notify_all()
+
+    # Yields every event from the first one, so a client that joins late still gets the results already produced
+    # Stops early once alive() reports that the client has gone
+    def follow(self, alive=None):
+        seen = 0
+        while True:
+            with self.condition:
+                while seen == len(self.events) and not self.done:
+                    self.condition.wait(timeout=0.5)
+                    if alive is not None and not alive():
+                        return
+                events = self.events[seen:]
+                finished = self.done
+            seen += len(events)
+            for event in events:
+                yield event
+            if finished and seen == len(self.events):
+                return
+
+    # A client went away, the analysis is cancelled once nobody is waiting for it
+    def unsubscribe(self):
+        with self.condition:
+            self.subscribers -= 1
+            abandoned = self.subscribers == 0 and not self.done
+        if abandoned and self.orchestrator is not None:
+            self.orchestrator.cancel()
+
+# This class runs check jobs from a priority queue with warm clients, caches and browsers, coalescing identical requests
+class CheckService():
+    def __init__(self, workers=4, check_concurrency=6, limiter=None):
+        self.queue = queue.PriorityQueue()
+        self.order = itertools.count()
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.check_concurrency = check_concurrency
+        self.limiter = limiter
+        self.coalesced = 0
+        self.completed = 0
+        self.workers = [threading.Thread(target=self.work, daemon=True) for _ in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    # Returns the job for the address and checks, joining the one in flight if there is one
+    def submit(self, address, checks, priority=PRIORITIES['interactive'], options=None):
+        options = options or {}
+        key = (address, tuple(checks), tuple(sorted(options.items())))
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is None:
+                job = self.jobs[key] = Job(address, checks, priority, options)
+                self.queue.put((priority, next(self.order), job))
+            else:
+                self.coalesced += 1
+                Metrics.count('daemon_coalesced_total')
+                # A more urgent client moves a queued job up, the stale queue entry is skipped by the workers
+                if priority < job.priority and not job.started:
+                    job.priority = priority
+                    self.queue.put((priority, next(self.order), job))
+            with job.condition:
+                job.subscribers += 1
+        return job
+
+    def work(self):
+        while True:
+            _, _, job = self.queue.get()
+            with self.lock:
+                if job.started:
+                    continue
+                job.started = True
+            try:
+                self.run(job)
+            finally:
+                with self.lock:
+                    self.jobs.pop((job.address, tuple(job.checks), tuple(sorted(job.options.items()))), None)
+                    self.completed += 1
+
+    def run(self, job):
+        started = time.perf_counter()
+        if job.subscribers == 0:
+            job.finish({'done': True, 'cancelled': True, 'elapsed': 0.0})
+            return
+        try:
+            job.orchestrator = Orchestrator.CheckOrchestrator(Checker.ERC20Checker(job.address, **job.options), max_workers=self.check_concurrency, limiter=self.limiter)
+            job.orchestrator.run(job.checks, on_result=lambda i, name, result, error: job.publish({
+                'index': i,
+                'check': name,
+                'result': result,
+                'error': None if error is None else repr(error),
+            }))
+            job.finish({'done': True, 'cancelled': job.orchestrator.deadline.reason is not None, 'elapsed': round(time.perf_counter() - started, 3)})
+        except Exception as e:
+            job.finish({'done': True, 'fatal': str(e), 'elapsed': round(time.perf_counter() - started, 3)})
+
+    def stats(self):
+        with self.lock:
+            return {'queue_depth': self.queue.qsize(), 'in_flight': len(self.jobs), 'coalesced': self.coalesced, 'completed': self.completed}
+
+# Serves POST /check as newline delimited JSON, one line per finished check, plus GET /health and GET /metrics
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        # True while the client still has the connection open, a closed socket reads as empty
+        def client_alive(self):
+            try:
+                readable, _, _ = select.select([self.connection], [], [], 0)
+                return not readable or self.connection.recv(1, socket.MSG_PEEK) != b''
+            except OSError:
+                return False
+
+        def do_GET(self):
+            if self.path == '/health':
+                return self.send_json(200, dict(service.stats(), status='ok'))
+            if self.path == '/metrics':
+                data = Metrics.registry.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            self.send_json(404, {'error': 'not_found'})
+
+        def do_POST(self):
+            if self.path != '/check':
+                return self.send_json(404, {'error': 'not_found'})
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                address = to_checksum_address(request.get('address', ''))
+            except ValueError:
+                return self.send_json(400, {'error': 'invalid_address', 'message': "Invalid Ethereum address."})
+            profile_name = request.get('profile') or 'full'
+            profile = Registry.PROFILES.get(profile_name)
+            if profile is None:
+                return self.send_json(400, {'error': 'unknown_profile', 'message': f"Unknown profile: {request.get('profile')}"})
+            checks = request.get('checks') or profile['checks']
+            unknown = Registry.unknown(checks)
+            if unknown:
+                return self.send_json(400, {'error': 'unknown_check', 'message': f"Unknown check(s): {', '.join(unknown)}"})
+            unsupported = Registry.unsupported(checks, profile_name)
+            if unsupported:
+                return self.send_json(400, {'error': 'unsupported_check', 'message': unsupported})
+            try:
+                Clients.ensure_connected()
+            except ConnectionError as e:
+                return self.send_json(503, {'error': 'connection', 'message': str(e)})
+            try:
+                priority = request.get('priority', 'interactive')
+                priority = int(PRIORITIES.get(priority, priority))
+            except (TypeError, ValueError):
+                return self.send_json(400, {'error': 'invalid_priority', 'message': f"Unknown priority: {priority}"})
+
+            job = service.submit(address, checks, priority, profile['options'])
+            # No Content-Length, the stream ends when the connection closes after the final "done" line
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            try:
+                for event in job.follow(alive=self.client_alive):
+                    self.wfile.write(json.dumps(event, default=str).encode() + b"\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                job.unsubscribe()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the token checker as a local service that keeps clients, caches and browsers warm")
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=int(os.getenv('CHECKER_DAEMON_WORKERS', 4)), help="number of tokens analyzed at the same time")
+    parser.add_argument('--check-concurrency', type=int, default=int(os.getenv('CHECK_CONCURRENCY', 6)), help="number of checks run at the same time for one token")
+    parser.add_argument('--browser-concurrency', type=int, default=int(os.getenv('DRIVER_POOL_SIZE', 2)), help="headless browsers kept in the pool")
+    parser.add_argument('--prestart', type=int, default=int(os.getenv('DRIVER_PRESTART', 1)), help="browsers started before the first request")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        Clients.ensure_connected()
+    except ConnectionError as e:
+        print(f"Warning: {e}")
+    # The daemon serves every profile, so the browser backend is loaded and warmed up front
+    import DriverPool
+    pool = DriverPool.configure(size=args.browser_concurrency)
+    try:
+        pool.warm(args.prestart)
+    except Exception as e:
+        print(f"Warning: could not start a browser: {e}")
+    # Pages that need a browser wait for a free one in the pool, so no backend limit is needed for them
+    service = CheckService(workers=args.workers, check_concurrency=args.check_concurrency)
+    server = ThreadingHTTPServer((HOST, args.port), make_handler(service))
+    server.daemon_threads = True
+    print(f"Checker daemon listening on http://{HOST}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        DriverPool.shutdown()
+
+if __name__ == "__main__":
+    main()
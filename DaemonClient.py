@@ -0,0 +1,113 @@
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+
+HOST = '127.0.0.1'
+PORT = int(os.getenv('CHECKER_DAEMON_PORT', 8765))
+
+# Raised when no daemon is listening, callers fall back to checking in-process
+class DaemonUnavailable(Exception):
+    pass
+
+# This class asks a running Daemon.py to analyze a token, it mirrors CheckOrchestrator's run and cancel
+# Only the standard library is imported, so a client starts instantly
+class RemoteCheck():
+    def __init__(self, address, priority='interactive', host=HOST, port=PORT, timeout=300, profile=None):
+        self.address = address
+        self.priority = priority
+        self.profile = profile
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connection = None
+        self.sock = None
+        self.cancelled = False
+
+    # Streams results, calling on_result(index, name, result, error) as each check finishes on the daemon
+    # Raises DaemonUnavailable if no daemon is running, ValueError for a bad address and ConnectionError if the daemon cannot reach the node
+    def run(self, function_names=None, on_result=None):
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        body = json.dumps({'address': self.address, 'checks': function_names, 'priority': self.priority, 'profile': self.profile})
+        try:
+            self.connection.request('POST', '/check', body=body, headers={'Content-Type': 'application/json'})
+            # http.client lets go of the socket once a streamed response starts, cancel() needs it to end the stream
+            self.sock = self.connection.sock
+            response = self.connection.getresponse()
+        except OSError as e:
+            self.connection.close()
+            raise DaemonUnavailable(str(e))
+        if response.status != 200:
+            error = json.loads(response.read() or b'{}')
+            self.connection.close()
+            if error.get('error') == 'invalid_address':
+                raise ValueError(error.get('message'))
+            if error.get('error') == 'connection':
+                raise ConnectionError(error.get('message'))
+            raise RuntimeError(error.get('message') or f"Daemon answered {response.status}")
+
+        results = {}
+        try:
+            for line in response:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    if self.cancelled:
+                        break
+                    raise RuntimeError("Malformed reply from the checker daemon")
+                if event.get('done'):
+                    if event.get('fatal'):
+                        raise RuntimeError(event['fatal'])
+                    break
+                results[event['check']] = event['result']
+                if on_result:
+                    on_result(event['index'], event['check'], event['result'], event['error'])
+        except (OSError, http.client.HTTPException):
+            # Closing the connection is how a run is cancelled, anything else is a real failure
+            if not self.cancelled:
+                raise
+        finally:
+            self.connection.close()
+        return results
+
+    # Drops the stream, the daemon cancels the analysis if no other client is waiting for the same token
+    def cancel(self):
+        self.cancelled = True
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+# Returns True if a daemon answers on the port
+def is_running(host=HOST, port=PORT, timeout=0.5):
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request('GET', '/health')
+        return connection.getresponse().status == 200
+    except OSError:
+        return False
+    finally:
+        connection.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check a token through a running Daemon.py and print one JSON line per check")
+    parser.add_argument('address')
+    parser.add_argument('--checks', help="comma separated list of checks to run")
+    parser.add_argument('--profile', help="full, browserless or onchain, browserless scrapes without a browser and onchain never scrapes")
+    parser.add_argument('--priority', default='interactive', help="interactive, normal, bulk or a number, lower runs first")
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args(argv)
+    checks = [check.strip() for check in args.checks.split(',') if check.strip()] if args.checks else None
+    try:
+        RemoteCheck(args.address, args.priority, port=args.port, profile=args.profile).run(checks,
+            on_result=lambda i, name, result, error: print(json.dumps({'check': name, 'result': result, 'error': error}), flush=True))
+    except DaemonUnavailable:
+        sys.exit(f"No checker daemon on port {args.port}, start one with: python Daemon.py")
+    except (ValueError, ConnectionError) as e:
+        sys.exit(str(e))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Raised inside a check once its deadline has passed or the analysis was cancelled
+class DeadlineExceeded(Exception):
+    pass
+
+# This class is a latency budget, a check's deadline is a child of the analysis deadline and is cancelled with it
+class Deadline():
+    def __init__(self, seconds=None, parent=None, started=True):
+        self.seconds = seconds
+        self.parent = parent
+        self.expires = None
+        self.started_at = None
+        self.reason = None
+        self.callbacks = []
+        self.lock = threading.Lock()
+        if started:
+            self.start()
+        if parent is not None:
+            parent.on_cancel(lambda: self.cancel(parent.reason))
+
+    # Starts the clock, a check's budget only starts once it is allowed to run
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+            if self.seconds is not None:
+                self.expires = self.started_at + self.seconds
+
+    # Seconds since the clock started
+    def elapsed(self):
+        return 0.0 if self.started_at is None else time.monotonic() - self.started_at
+
+    # Seconds left, bounded by the parent, None when neither has a time limit
+    def remaining(self):
+        left = None if self.expires is None else self.expires - time.monotonic()
+        if self.parent is not None:
+            parent_left = self.parent.remaining()
+            if parent_left is not None:
+                left = parent_left if left is None else min(left, parent_left)
+        return left
+
+    def expired(self):
+        if self.reason is not None:
+            return True
+        left = self.remaining()
+        return left is not None and left <= 0
+
+    # Cancels the budget and runs the cleanup callbacks, e.g. quitting a browser that is still loading
+    def cancel(self, reason="cancelled"):
+        with self.lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    # Registers a callback run on cancel, returns a function that unregisters it
+    def on_cancel(self, callback):
+        with self.lock:
+            if self.reason is None:
+                self.callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback):
+        with self.lock:
+            if callback in self.callbacks:
+                self.callbacks.remove(callback)
+
+_current = contextvars.ContextVar('deadline', default=None)
+
+# Deadline of the check running in this thread, None outside the orchestrator
+def current():
+    return _current.get()
+
+# Makes a deadline current while the block runs
+@contextmanager
+def scope(deadline):
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+# Raises DeadlineExceeded if the current check has run out of time or was cancelled
+def check():
+    deadline = current()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded(f"Deadline {deadline.reason or 'expired'}")
+
+# Seconds left for the current check, capped at default, default when there is no deadline
+def remaining(default=None):
+    deadline = current()
+    left = deadline.remaining() if deadline is not None else None
+    if left is None:
+        return default
+    left = max(0.0, left)
+    return left if default is None else min(default, left)
+
+# Timeout to pass to a blocking call so it cannot outlive the current check, raises if no time is left
+def timeout(default=None):
+    check()
+    left = remaining(default)
+    return None if left is None else max(0.01, left)
+
+# Runs callback if the current check is cancelled while the block runs, used to reclaim browsers
+@contextmanager
+def on_cancel(callback):
+    deadline = current()
+    if deadline is None:
+        yield
+        return
+    remove = deadline.on_cancel(callback)
+    try:
+        yield
+    finally:
+        remove()
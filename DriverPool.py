@@ -0,0 +1,210 @@
+import atexit
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+import RateLimiter
+import Deadline
+import Metrics
+from FetchBackends import USER_AGENT
+
+# Builds the headless Chrome options shared by every scraping check
+def chrome_options():
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--log-level=3")
+    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    options.add_argument(f"user-agent={USER_AGENT}")
+    return options
+
+# Raised when a scraped site answers with a bot challenge instead of the page
+class ChallengePageError(Exception):
+    pass
+
+# Loads a page once the host's rate limit allows it and waits for the ready condition instead of a fixed sleep
+# The wait never runs past the current check's deadline
+def load(driver, url, ready=None, timeout=10):
+    limiter = RateLimiter.get_limiter()
+    limiter.acquire(url)
+    Deadline.check()
+    host = RateLimiter.host_of(url)
+    with Metrics.span('page_load', host=host):
+        driver.get(url)
+    if ready is not None:
+        try:
+            with Metrics.span('page_ready', host=host):
+                WebDriverWait(driver, Deadline.timeout(timeout)).until(ready)
+        except Exception:
+            if RateLimiter.is_challenge_page(driver.page_source):
+                limiter.throttled(url)
+                raise ChallengePageError(f"Challenge page served for {url}")
+            raise
+    limiter.succeeded(url)
+
+# Wraps a WebDriver together with the number of times it has been borrowed
+class PooledDriver():
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+# This class keeps a bounded number of warm headless browsers that checks borrow and give back
+class DriverPool():
+    def __init__(self, size=2, max_uses=50, prestart=0, factory=None):
+        self.size = size
+        self.max_uses = max_uses
+        self.factory = factory or (lambda: webdriver.Chrome(options=chrome_options()))
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.closed = False
+        self.alive = 0
+        self.started = 0
+        self.recycled = 0
+        self.warm(prestart)
+
+    # Starts a new browser
+    def _start(self):
+        with self.lock:
+            self.alive += 1
+            self.started += 1
+        try:
+            with Metrics.span('browser_start'):
+                return PooledDriver(self.factory())
+        except Exception:
+            with self.lock:
+                self.alive -= 1
+            raise
+
+    # Quits a browser, ignoring errors from one that has already crashed
+    def _stop(self, pooled):
+        with self.lock:
+            self.alive -= 1
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    # Quits a browser that crashed or reached max_uses
+    def _recycle(self, pooled):
+        self._stop(pooled)
+        with self.lock:
+            self.recycled += 1
+
+    # Returns True if the browser still answers WebDriver commands
+    def is_healthy(self, pooled):
+        try:
+            pooled.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    # Pre-starts up to count idle browsers without exceeding the pool size
+    def warm(self, count):
+        while not self.closed and self.alive < min(count, self.size):
+            self.idle.put(self._start())
+
+    # Takes an idle healthy browser, or starts a new one if none are idle
+    def acquire(self, timeout=None):
+        if self.closed:
+            raise RuntimeError("Driver pool has been shut down")
+        if not self.slots.acquire(timeout=timeout):
+            raise TimeoutError("Timed out waiting for a free browser")
+        try:
+            while True:
+                try:
+                    pooled = self.idle.get_nowait()
+                except queue.Empty:
+                    pooled = self._start()
+                    break
+                if self.is_healthy(pooled):
+                    break
+                self._recycle(pooled)
+            pooled.uses += 1
+            return pooled
+        except Exception:
+            self.slots.release()
+            raise
+
+    # Gives a browser back to the pool, recycling it after max_uses or when it has crashed
+    def release(self, pooled, broken=False):
+        try:
+            if broken or self.closed or pooled.uses >= self.max_uses:
+                self._recycle(pooled)
+                return
+            try:
+                pooled.driver.delete_all_cookies()
+                pooled.driver.switch_to.default_content()
+            except Exception:
+                self._recycle(pooled)
+                return
+            self.idle.put(pooled)
+        finally:
+            self.slots.release()
+
+    # Quits a borrowed browser from another thread so a check blocked on it fails fast, release() then replaces it
+    def abort(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    # Context manager used by the checks: with pool.driver() as driver: ...
+    # If the check's deadline is cancelled while the browser is borrowed, the browser is quit to reclaim it
+    @contextmanager
+    def driver(self, timeout=None):
+        with Metrics.span('browser_acquire'):
+            pooled = self.acquire(timeout=Deadline.remaining(timeout))
+        broken = False
+        try:
+            with Deadline.on_cancel(lambda: self.abort(pooled)):
+                yield pooled.driver
+        except Exception:
+            # A WebDriver error may leave the browser in an unknown state, so check it before reuse
+            broken = not self.is_healthy(pooled)
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    # Quits every idle browser and refuses further borrowing
+    def shutdown(self):
+        self.closed = True
+        while True:
+            try:
+                self._stop(self.idle.get_nowait())
+            except queue.Empty:
+                break
+
+_pool = None
+_pool_lock = threading.RLock()
+_exit_hook_registered = False
+
+# Creates the process-wide pool with explicit settings, replacing any pool that was already started
+def configure(size=2, max_uses=50, prestart=0):
+    global _pool, _exit_hook_registered
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        if not _exit_hook_registered:
+            atexit.register(shutdown)
+            _exit_hook_registered = True
+        _pool = DriverPool(size=size, max_uses=max_uses, prestart=prestart)
+        return _pool
+
+# Returns the process-wide pool used by the GUI and the headless runners
+def get_pool():
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                return configure(size=int(os.getenv('DRIVER_POOL_SIZE', 2)), max_uses=int(os.getenv('DRIVER_MAX_USES', 50)), prestart=int(os.getenv('DRIVER_PRESTART', 0)))
+    return _pool
+
+# Shuts down the process-wide pool, if one was started
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
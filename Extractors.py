@@ -0,0 +1,112 @@
+import json
+from lxml import etree, html as lxml_html
+import Metrics
+
+# Every selector used to read the scraped pages, kept in one place so site changes only need edits here
+SELECTORS = {
+    'honeypot': {
+        # Each result panel is a list item holding an h4 label and a p value
+        'items': "//li[.//h4]",
+        'label': "normalize-space(.//h4[1])",
+        'value': "normalize-space(.//p[1])",
+    },
+    'holders': {
+        'rows': "//*[@id='maintable']/div[2]/table/tbody/tr",
+        'rank': "normalize-space(td[1])",
+        'address': "string(td[2]/div//a[@data-clipboard-text][1]/@data-clipboard-text)",
+        'percentage': "normalize-space(td[4])",
+        'type': "string(td[2]/div//i[@aria-label][1]/@aria-label)",
+    },
+    'dextools': {
+        'buy_change': "normalize-space((//span[contains(concat(' ', normalize-space(@class), ' '), ' buy-color ')])[1])",
+        'sell_change': "normalize-space((//span[contains(concat(' ', normalize-space(@class), ' '), ' sell-color ')])[1])",
+        'labels': "//label",
+        'label_value': "normalize-space(following-sibling::span[1])",
+    },
+}
+
+# Conditions the browser waits for before a page is read
+READY = {
+    'honeypot': "//li[.//h4[normalize-space()='Buy Tax']]//p[normalize-space()]",
+    'holders_frame': "tokeholdersiframe",
+    'holders': SELECTORS['holders']['rows'],
+    'dextools': "value",
+}
+
+# Selectors compiled once at import, an XPath object is much cheaper to evaluate than a string
+COMPILED = {page: {name: etree.XPath(selector) for name, selector in selectors.items()} for page, selectors in SELECTORS.items()}
+
+# Parses a page once with lxml
+def parse(page_source):
+    return lxml_html.fromstring(page_source) if page_source else None
+
+# Reads every labelled value on the honeypot.is result page, e.g. {'Buy Tax': '0%', 'Sell Tax': '0%', "Can't sell": '0', 'Siphoned': '0'}
+@Metrics.timed('parse', page='honeypot')
+def parse_honeypot(page_source):
+    root = parse(page_source)
+    if root is None:
+        return {}
+    selectors = COMPILED['honeypot']
+    values = {}
+    for item in selectors['items'](root):
+        label = selectors['label'](item)
+        value = selectors['value'](item)
+        # The first panel with a label wins, later duplicates come from other page sections
+        if label and value and label not in values:
+            values[label] = value
+    return values
+
+# Reads the top rows of the Etherscan holders table as dicts of rank, address, percentage and type
+@Metrics.timed('parse', page='holders')
+def parse_holders(page_source, top=10):
+    root = parse(page_source)
+    if root is None:
+        return []
+    selectors = COMPILED['holders']
+    holders = []
+    for row in selectors['rows'](root)[:top]:
+        holders.append({
+            'rank': selectors['rank'](row),
+            'address': selectors['address'](row).strip(),
+            'percentage': selectors['percentage'](row).strip('%'),
+            'type': selectors['type'](row).strip(),
+        })
+    return holders
+
+# Reads the 24h change, liquidity and total market cap from a dextools pair page
+@Metrics.timed('parse', page='dextools')
+def parse_dextools(page_source):
+    root = parse(page_source)
+    if root is None:
+        return {}
+    selectors = COMPILED['dextools']
+    values = {'change': selectors['buy_change'](root) or None, 'liquidity': None, 'market_cap': None}
+    if values['change'] == 'buy':
+        values['change'] = selectors['sell_change'](root) or None
+    for label in selectors['labels'](root):
+        text = label.text_content()
+        if 'Liquidity:' in text:
+            values['liquidity'] = selectors['label_value'](label) or None
+        if 'TMCap:' in text:
+            values['market_cap'] = selectors['label_value'](label) or None
+    return values
+
+# Reads the same values as parse_honeypot from the JSON the honeypot.is page is built from, {} if the reply is not that JSON
+@Metrics.timed('parse', page='honeypot_api')
+def parse_honeypot_api(text):
+    try:
+        data = json.loads(text)
+        simulation = data.get('simulationResult') or {}
+        holders = data.get('holderAnalysis') or {}
+    except (ValueError, AttributeError):
+        return {}
+    values = {}
+    if simulation.get('buyTax') is not None:
+        values['Buy Tax'] = f"{simulation['buyTax']}%"
+    if simulation.get('sellTax') is not None:
+        values['Sell Tax'] = f"{simulation['sellTax']}%"
+    if holders.get('failed') is not None:
+        values["Can't sell"] = str(holders['failed'])
+    if holders.get('siphoned') is not None:
+        values['Siphoned'] = str(holders['siphoned'])
+    return values
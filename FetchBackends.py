@@ -0,0 +1,233 @@
+import asyncio
+import atexit
+import os
+import threading
+from lxml import html as lxml_html
+import RateLimiter
+import Deadline
+import Metrics
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/64.0.3282.140 Safari/537.36 Edge/17.17134"
+
+# Connections kept open by the browserless backend, shared by every host
+POOL_SIZE = int(os.getenv('FETCH_POOL_SIZE', 32))
+
+# Pages whose visible text is shorter than this while they carry scripts are treated as a JavaScript shell
+SHELL_TEXT_LENGTH = 200
+
+# Raised when no backend could serve a page
+class FetchError(Exception):
+    pass
+
+# One page read by a scraping check
+# The browserless backend fetches http_url and parses it with http_parse, the browser loads browser_url, waits for every ready step
+# and parses with browser_parse; a result is only accepted when usable(values) is True
+# ready steps are ('xpath', expression), ('class', name) or ('frame', id), partial accepts whatever rendered when a wait times out
+class Target():
+    def __init__(self, name, http_url, http_parse, browser_url, browser_parse, usable, ready=(), partial=True, timeout=10):
+        self.name = name
+        self.http_url = http_url
+        self.http_parse = http_parse
+        self.browser_url = browser_url
+        self.browser_parse = browser_parse
+        self.usable = usable
+        self.ready = list(ready)
+        self.partial = partial
+        self.timeout = timeout
+
+# Why a browserless response cannot be used before it is parsed: a bot challenge or an error status
+def unusable_reason(status, text):
+    if RateLimiter.is_challenge_page(text):
+        return 'challenge'
+    if status != 200:
+        return f"status_{status}"
+    return None
+
+# True for an HTML page that is mostly scripts with hardly any text, i.e. one only a browser can fill in
+def is_js_shell(text):
+    if not text.lstrip().startswith('<'):
+        return False
+    try:
+        root = lxml_html.fromstring(text)
+    except Exception:
+        return False
+    if not root.xpath('//script'):
+        return False
+    for element in root.xpath('//script | //style | //noscript'):
+        element.drop_tree()
+    return len(root.text_content().strip()) < SHELL_TEXT_LENGTH
+
+# Per page counts of the backend that served each usable result, of the reasons the browser was needed and of fetches no backend could serve
+class FetchStats():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pages = {}
+
+    def record(self, page, backend=None, escalation=None, failure=None):
+        if backend:
+            Metrics.count('fetch_served_total', page=page, backend=backend)
+        if escalation:
+            Metrics.count('fetch_escalations_total', page=page, reason=escalation)
+        if failure:
+            Metrics.count('fetch_failures_total', page=page, reason=failure)
+        with self.lock:
+            entry = self.pages.setdefault(page, {'served': {}, 'escalations': {}, 'failures': {}})
+            if backend:
+                entry['served'][backend] = entry['served'].get(backend, 0) + 1
+            if escalation:
+                entry['escalations'][escalation] = entry['escalations'].get(escalation, 0) + 1
+            if failure:
+                entry['failures'][failure] = entry['failures'].get(failure, 0) + 1
+
+    def stats(self):
+        with self.lock:
+            return {page: {name: dict(counts) for name, counts in entry.items()} for page, entry in self.pages.items()}
+
+fetch_stats = FetchStats()
+
+# This class fetches pages over pooled keep-alive connections on an asyncio loop of its own, without a browser
+# Checks call it from their threads, the request itself runs on the loop so many fetches share one connection pool
+# aiohttp is optional, without it the process-wide requests session is used instead
+class HttpBackend():
+    def __init__(self, pool_size=POOL_SIZE):
+        self.pool_size = pool_size
+        self.lock = threading.Lock()
+        self.loop = None
+        self.session = None
+        self.aiohttp = None
+
+    # Starts the event loop thread and the aiohttp session on first use, returns False if aiohttp is not installed
+    def _start(self):
+        with self.lock:
+            if self.loop is not None:
+                return True
+            try:
+                import aiohttp
+            except ImportError:
+                return False
+            self.aiohttp = aiohttp
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='fetch-backend', daemon=True).start()
+            self.session = asyncio.run_coroutine_threadsafe(self._open(), loop).result()
+            self.loop = loop
+            return True
+
+    async def _open(self):
+        connector = self.aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+        return self.aiohttp.ClientSession(connector=connector, headers={'User-Agent': USER_AGENT, 'Accept-Language': 'en-US,en;q=0.9'})
+
+    async def _get(self, url, timeout):
+        async with self.session.get(url, timeout=self.aiohttp.ClientTimeout(total=timeout)) as response:
+            return response.status, await response.text(errors='replace'), response.headers.get('Retry-After')
+
+    # Returns (status, text), paced by the host's rate limit and never running past the current check's deadline
+    def get(self, url, timeout=10):
+        if not self._start():
+            import Clients
+            # The shared session paces the request and reports throttling itself
+            response = Clients.get_session().get(url, timeout=Deadline.timeout(timeout), headers={'User-Agent': USER_AGENT})
+            if RateLimiter.is_challenge_page(response.text):
+                RateLimiter.get_limiter().throttled(url)
+            return response.status_code, response.text
+        limiter = RateLimiter.get_limiter()
+        host = RateLimiter.host_of(url)
+        Metrics.observe('rate_limit_wait_seconds', limiter.acquire(url), host=host)
+        timeout = Deadline.timeout(timeout)
+        with Metrics.span('http_request', host=host):
+            future = asyncio.run_coroutine_threadsafe(self._get(url, timeout), self.loop)
+            with Deadline.on_cancel(future.cancel):
+                status, text, retry_after = future.result(timeout + 1)
+        Metrics.count('http_responses_total', host=host, status=status)
+        if status == 429 or RateLimiter.is_challenge_page(text):
+            limiter.throttled(url, float(retry_after) if retry_after and retry_after.isdigit() else None)
+        else:
+            limiter.succeeded(url)
+        return status, text
+
+    def close(self):
+        with self.lock:
+            if self.loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self.session.close(), self.loop).result(5)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.loop = None
+            self.session = None
+
+# Loads pages in a pooled headless browser, selenium is only imported once a page needs it
+class BrowserBackend():
+    def get(self, target):
+        import DriverPool
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+        conditions = {
+            'xpath': lambda value: EC.presence_of_element_located((By.XPATH, value)),
+            'class': lambda value: EC.presence_of_element_located((By.CLASS_NAME, value)),
+            'frame': lambda value: EC.frame_to_be_available_and_switch_to_it(value),
+        }
+        steps = [conditions[kind](value) for kind, value in target.ready]
+        with DriverPool.get_pool().driver() as driver:
+            try:
+                DriverPool.load(driver, target.browser_url, steps[0] if steps else None, timeout=target.timeout)
+                for step in steps[1:]:
+                    WebDriverWait(driver, Deadline.timeout(target.timeout)).until(step)
+            except (TimeoutException, DriverPool.ChallengePageError):
+                if not target.partial:
+                    raise
+                # Parse whatever was rendered, missing values are reported by the check
+            return driver.page_source
+
+_http = None
+_http_lock = threading.Lock()
+
+# Returns the process-wide browserless backend, its connections are closed at exit
+def get_http():
+    global _http
+    with _http_lock:
+        if _http is None:
+            _http = HttpBackend()
+            atexit.register(shutdown)
+        return _http
+
+def shutdown():
+    global _http
+    with _http_lock:
+        if _http is not None:
+            _http.close()
+            _http = None
+
+# Reads a target with the browserless backend first and only loads it in a browser when that response cannot be used
+# Returns (values, backend), backend is 'http' or 'browser' and is only counted as serving the page once its values are usable
+# Raises FetchError when no backend gave usable values, counted as a failure: no_browser, browser_error or browser_unusable
+def fetch(target, use_browser=True):
+    reason = None
+    if target.http_url:
+        try:
+            status, text = get_http().get(target.http_url, target.timeout)
+            reason = unusable_reason(status, text)
+            if reason is None:
+                values = target.http_parse(text)
+                if target.usable(values):
+                    fetch_stats.record(target.name, 'http')
+                    return values, 'http'
+                reason = 'js_shell' if is_js_shell(text) else 'missing_values'
+        except Deadline.DeadlineExceeded:
+            raise
+        except Exception:
+            reason = 'error'
+    if not use_browser:
+        fetch_stats.record(target.name, escalation=reason, failure='no_browser')
+        raise FetchError(f"{target.name} could not be read without a browser ({reason})")
+    try:
+        values = target.browser_parse(BrowserBackend().get(target))
+    except Exception as e:
+        fetch_stats.record(target.name, escalation=reason, failure='browser_error')
+        if isinstance(e, Deadline.DeadlineExceeded):
+            raise
+        raise FetchError(f"{target.name} could not be rendered in a browser ({type(e).__name__})") from e
+    if not target.usable(values):
+        fetch_stats.record(target.name, escalation=reason, failure='browser_unusable')
+        raise FetchError(f"{target.name} rendered in a browser without the values the check needs")
+    fetch_stats.record(target.name, 'browser', reason)
+    return values, 'browser'
@@ -6,7 +6,10 @@ from ttkthemes import ThemedTk
 from tkinter import messagebox
 import threading
 from functools import partial
-import Checker
+import os
+import DaemonClient
+import Orchestrator
+import Registry
 
 # Graphical User Interface for ERC-20 token analysis
 class MyApp(tk.Tk):
@@ -46,6 +49,11 @@ class HomeFrame(tk.Frame):
         self.button1 = ctk.CTkButton(self.frame, width=150, text="Check",  corner_radius=6, command=self.check)
         self.button1.place(x=223, y=75) 
 
+        # Create cancel button, only enabled while an analysis is running
+        self.button2 = ctk.CTkButton(self.frame, width=80, text="Cancel",  corner_radius=6, command=self.cancel, state="disabled")
+        self.button2.place(x=383, y=75)
+        self.runner = None
+
         # Array to hold the result boxes
         self.result_boxes = []
 
@@ -55,6 +63,27 @@ class HomeFrame(tk.Frame):
         # Disable the button immediately after starting the thread
         self.button1.configure(state="disabled")
 
+    # Stops the running analysis, checks that have not finished are reported as cancelled
+    def cancel(self):
+        self.cancelled = True
+        if self.runner is not None:
+            self.runner.cancel()
+        self.button2.configure(state="disabled")
+
+    # Uses a running Daemon.py when there is one, so clients, caches and browsers are already warm, otherwise checks in this process
+    def create_runner(self, contract_address):
+        if DaemonClient.is_running():
+            return DaemonClient.RemoteCheck(contract_address)
+        return self.create_local_runner(contract_address)
+
+    def create_local_runner(self, contract_address):
+        # Checker is only imported when the checks run in this process, selenium only once a browser check starts
+        import Checker
+        # Creates instance of Checker.py
+        imported_class_instance = Checker.ERC20Checker(contract_address)
+        imported_class_instance.ensure_connected()
+        return Orchestrator.CheckOrchestrator(imported_class_instance, max_workers=int(os.getenv('CHECK_CONCURRENCY', 6)))
+
     def do_checks(self):
         # Clear previous result boxes
         try:
@@ -63,10 +92,33 @@ class HomeFrame(tk.Frame):
             pass
 
         contract_address = self.entry1.get()
+        self.cancelled = False
 
         try:
-            # Creates instance of Checker.py
-            imported_class_instance = Checker.ERC20Checker(contract_address)
+            self.runner = self.create_runner(contract_address)
+
+            # Check and delete the existing completed_label before creating a new one
+            if hasattr(self, 'completed_label'):
+                self.canvas.delete(self.completed_label)
+            if hasattr(self, 'note'):
+                self.canvas.delete(self.note)
+
+            self.completed_label = self.canvas.create_text(500, 205, text="Currently Analyzing...", fill = 'white', font=('Century Gothic', 13))
+            # Runs the checks concurrently, each result box is filled in as soon as its check completes
+            # Checks that overrun their deadline are reported as timed out so the rest of the report still completes
+            self.after(0, lambda: self.button2.configure(state="normal"))
+            on_result = lambda i, function_name, result, error: self.create_result_box(str(result), i)
+            try:
+                try:
+                    self.runner.run(Orchestrator.DEFAULT_CHECKS, on_result=on_result)
+                except DaemonClient.DaemonUnavailable:
+                    # The daemon went away between the health check and the request, run the checks in this process instead
+                    self.runner = self.create_local_runner(contract_address)
+                    self.runner.run(Orchestrator.DEFAULT_CHECKS, on_result=on_result)
+            finally:
+                self.runner = None
+                self.after(0, lambda: self.button2.configure(state="disabled"))
+                self.after(0, self._enable_button)
         except ConnectionError:
             if hasattr(self, 'completed_label'):
                 self.canvas.delete(self.completed_label)
@@ -84,28 +136,12 @@ class HomeFrame(tk.Frame):
             self.after(0, self._enable_button)
             return
 
-        # Check and delete the existing completed_label before creating a new one
-        if hasattr(self, 'completed_label'):
-            self.canvas.delete(self.completed_label)
-        if hasattr(self, 'note'):
-            self.canvas.delete(self.note)
-
-        self.completed_label = self.canvas.create_text(500, 205, text="Currently Analyzing...", fill = 'white', font=('Century Gothic', 13))
-        # List of function names that are called from Checker.py
-        function_names = ['get_name', 'is_ownership_renounced_or_no_owner', 'check_scam_patterns', 'scrape_honeypot', 'market_cap', 'get_top_holders']  # replace with your actual function names
-        # Creates a label indicating the check has been completed
-        for i, function_name in enumerate(function_names):
-            # Call the function and get the result
-            result = getattr(imported_class_instance, function_name)()
-            # Uses the Tkinter-compatible method to update the GUI
-            self.create_result_box(str(result), i)
-
         # Add DYOR note
         self.note = self.canvas.create_text(775, 300, text="Note:\nThis analysis is not a foolproof method, various factors including team, sentiment, and new code configuration can lead to improper analysis of tokens. Please be mindful of these factors and as always be sure to do your own research into the token and team! I hope you enjoy!", fill = 'white', font=('Century Gothic', 11, 'bold'), width= 285, justify="center")
         # Destroy the label
         self.canvas.delete(self.completed_label)
         # Create a new label
-        self.completed_label = self.canvas.create_text(495, 205, text="Token Analysis Complete!", fill = 'white', font=('Century Gothic', 13))
+        self.completed_label = self.canvas.create_text(495, 205, text="Token Analysis Cancelled" if self.cancelled else "Token Analysis Complete!", fill = 'white', font=('Century Gothic', 13))
         # At the end of do_search, re-enable the button
         self.after(0, self._enable_button)
     
@@ -120,7 +156,7 @@ class HomeFrame(tk.Frame):
         LABEL_HEIGHT = 20  # height of the label
         LABEL_HEIGHT_FACTOR = 23
         LABEL_FONT_SIZE = 15  # font size of the label
-        Label_Names = [' Name ', ' Owner ', ' Contract ', ' Honeypot ', ' Market Info ', ' Top 10 Holders ']
+        Label_Names = Registry.labels(Orchestrator.DEFAULT_CHECKS)
 
         # Calculate margins dynamically
         X_MARGIN = 20  # horizontal margin
@@ -0,0 +1,231 @@
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+import Cache
+from Rpc import RpcError
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+ZERO_ADDRESS = '0x' + '0' * 40
+BURN_ADDRESSES = (ZERO_ADDRESS, '0x000000000000000000000000000000000000dead')
+
+# Node error messages that mean the eth_getLogs block range returned too many results
+RANGE_ERRORS = ('more than', 'too many', 'range', 'limit exceeded', 'response size', 'timeout')
+
+# Raised when an index run stops at max_logs, the progress made so far is kept
+class IndexIncomplete(Exception):
+    pass
+
+# Applies Transfer logs to a balance map of lower-case address -> raw token units
+def fold_transfers(balances, logs):
+    for log in logs:
+        topics = log.get('topics', [])
+        data = log.get('data', '0x')
+        if len(topics) < 3 or len(data) < 3:
+            # Not an ERC-20 Transfer, e.g. an ERC-721 transfer with an indexed token id
+            continue
+        value = int(data[2:66], 16)
+        sender = '0x' + topics[1][-40:].lower()
+        receiver = '0x' + topics[2][-40:].lower()
+        if sender != ZERO_ADDRESS:
+            balances[sender] -= value
+            if balances[sender] == 0:
+                del balances[sender]
+        balances[receiver] += value
+        if balances[receiver] == 0:
+            del balances[receiver]
+    return balances
+
+# Gini coefficient of positive balances, 0 is perfectly equal and 1 is one holder owning everything
+def gini(values):
+    values = sorted(value for value in values if value > 0)
+    n = len(values)
+    total = sum(values)
+    if n == 0 or total == 0:
+        return 0.0
+    weighted = sum((i + 1) * value for i, value in enumerate(values))
+    return (2 * weighted) / (n * total) - (n + 1) / n
+
+# Herfindahl-Hirschman index of holder shares, between 1/n and 1
+def hhi(values, total):
+    if not total:
+        return 0.0
+    return sum((value / total) ** 2 for value in values if value > 0)
+
+# Formats holder rows and applies the same-percentage heuristic, more than 3 individuals with the same share is a warning sign
+def format_top_holders(rows):
+    top_holders = []
+    percentage_counts = {}  # Dictionary to count individual holders with same percentage
+    warning = None
+    for row in rows:
+        percentage = row['percentage']
+        if row['type'] == "individual":
+            percentage_counts[percentage] = percentage_counts.get(percentage, 0) + 1
+            if percentage_counts[percentage] > 2 and warning is None:
+                warning = f"Warning! More than 3 individuals with same percentage ({percentage}%) found"
+        top_holders.append(f"{row['rank']} --- {row['address']} --- {float(percentage)}% --- {row['type']}")
+    if warning:
+        top_holders.append(warning)
+    return "\n".join(top_holders)
+
+# This class keeps a per-token balance map built from Transfer logs, checkpointed so later runs only read new blocks
+class HolderIndexer():
+    def __init__(self, client, path=Cache.DEFAULT_PATH, chain=1, confirmations=12, initial_chunk=2000, max_chunk=500000, target_logs=5000):
+        self.client = client
+        self.chain = chain
+        self.confirmations = confirmations
+        self.initial_chunk = initial_chunk
+        self.max_chunk = max_chunk
+        self.target_logs = target_logs
+        self.lock = threading.Lock()
+        self.token_locks = defaultdict(threading.Lock)
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS holder_index (
+            chain INTEGER NOT NULL,
+            token TEXT NOT NULL,
+            last_block INTEGER NOT NULL,
+            balances BLOB NOT NULL,
+            PRIMARY KEY (chain, token))""")
+        self.db.commit()
+
+    # Returns (last indexed block, balances) from the checkpoint, or (None, empty map) for a new token
+    def load(self, token):
+        with self.lock:
+            row = self.db.execute("SELECT last_block, balances FROM holder_index WHERE chain = ? AND token = ?", (self.chain, token.lower())).fetchone()
+        if row is None:
+            return None, defaultdict(int)
+        balances = json.loads(zlib.decompress(row[1]))
+        return row[0], defaultdict(int, {address: int(value) for address, value in balances.items()})
+
+    def save(self, token, last_block, balances):
+        blob = zlib.compress(json.dumps({address: str(value) for address, value in balances.items()}).encode())
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO holder_index VALUES (?, ?, ?, ?)", (self.chain, token.lower(), last_block, blob))
+            self.db.commit()
+
+    # Finds the block a contract was deployed in with a binary search on eth_getCode, 0 if the node has no history
+    def deployment_block(self, token, head):
+        low, high = 0, head
+        try:
+            while low < high:
+                middle = (low + high) // 2
+                if self.client.call('eth_getCode', [token, hex(middle)]) not in (None, '0x'):
+                    high = middle
+                else:
+                    low = middle + 1
+        except RpcError:
+            return 0
+        return low
+
+    # Reads Transfer logs for a block range, halving the range when the node refuses it as too large
+    # Returns the logs, the last block actually read and whether the range had to be shrunk
+    def get_logs(self, token, start, end):
+        shrunk = False
+        while True:
+            try:
+                return self.client.call('eth_getLogs', [{'address': token, 'topics': [TRANSFER_TOPIC], 'fromBlock': hex(start), 'toBlock': hex(end)}]), end, shrunk
+            except RpcError as e:
+                if end == start or not any(marker in str(e.message).lower() for marker in RANGE_ERRORS):
+                    raise
+                end = start + (end - start) // 2
+                shrunk = True
+
+    # Brings the token's balance map up to the latest confirmed block and returns (last block, balances)
+    def index(self, token, max_logs=None):
+        token = token.lower()
+        with self.token_locks[token]:
+            last_block, balances = self.load(token)
+            head = int(self.client.call('eth_blockNumber'), 16) - self.confirmations
+            start = self.deployment_block(token, head) if last_block is None else last_block + 1
+            chunk = self.initial_chunk
+            ceiling = self.max_chunk
+            read = 0
+            checkpoint = last_block
+            try:
+                while start <= head:
+                    logs, end, shrunk = self.get_logs(token, start, min(head, start + chunk - 1))
+                    fold_transfers(balances, logs)
+                    read += len(logs)
+                    # Grow the range while blocks are sparse, but not past a size the node has already refused
+                    chunk = end - start + 1
+                    if shrunk:
+                        ceiling = chunk
+                    if len(logs) < self.target_logs // 2:
+                        chunk = min(ceiling, chunk * 2)
+                    last_block = end
+                    start = end + 1
+                    if max_logs is not None and read >= max_logs and start <= head:
+                        raise IndexIncomplete(f"Indexed {read} transfers up to block {last_block}, {head - last_block} blocks left")
+            finally:
+                # Chunks already folded are kept when max_logs, the deadline or an RPC error stops the scan, the next run resumes after them
+                if last_block != checkpoint:
+                    self.save(token, last_block, balances)
+            if last_block is None:
+                last_block = head
+                self.save(token, last_block, balances)
+            return last_block, balances
+
+    # Folds Transfer logs read by someone else, such as the watchlist, into the checkpoint up to to_block
+    # covered_from is the first block from which the caller has seen every Transfer of the token, so blocks between the checkpoint and
+    # the logs are known to hold none, returns False when the checkpoint is older than that and index() has to catch up itself
+    def apply(self, token, logs, covered_from, to_block):
+        token = token.lower()
+        with self.token_locks[token]:
+            last_block, balances = self.load(token)
+            if last_block is None or last_block + 1 < covered_from:
+                return False
+            # Logs the checkpoint already holds, e.g. read by a check that ran in between, are skipped
+            fold_transfers(balances, [log for log in logs if int(log['blockNumber'], 16) > last_block])
+            self.save(token, max(last_block, to_block), balances)
+            return True
+
+    # Marks top holders as burn addresses, contracts or individuals, using one batched eth_getCode call
+    def holder_types(self, addresses):
+        codes = self.client.batch([('eth_getCode', [address, 'latest']) for address in addresses])
+        types = {}
+        for address, code in zip(addresses, codes):
+            if address in BURN_ADDRESSES:
+                types[address] = "Burn Address"
+            elif isinstance(code, str) and code not in ('0x', ''):
+                types[address] = "Contract"
+            else:
+                types[address] = "individual"
+        return types
+
+    # Top-N holders with their share of supply, plus Gini and HHI concentration of all holders
+    def summary(self, token, top=10, total_supply=None, max_logs=None):
+        last_block, balances = self.index(token, max_logs=max_logs)
+        total = total_supply or sum(value for value in balances.values() if value > 0)
+        largest = heapq.nlargest(top, ((value, address) for address, value in balances.items() if value > 0))
+        types = self.holder_types([address for _, address in largest]) if largest else {}
+        rows = [{
+            'rank': rank,
+            'address': address,
+            'percentage': f"{value / total * 100:.4f}" if total else "0",
+            'type': types.get(address, "individual"),
+        } for rank, (value, address) in enumerate(largest, 1)]
+        return {
+            'block': last_block,
+            'holders': sum(1 for value in balances.values() if value > 0),
+            'rows': rows,
+            'top_share': sum(value for value, _ in largest) / total if total else 0.0,
+            'gini': gini(balances.values()),
+            'hhi': hhi(balances.values(), total),
+        }
+
+_indexer = None
+_indexer_lock = threading.Lock()
+
+# Returns the process-wide indexer, sharing the cache database file
+def get_indexer(client):
+    global _indexer
+    with _indexer_lock:
+        if _indexer is None:
+            _indexer = HolderIndexer(client, path=os.getenv('CHECKER_CACHE_PATH', Cache.DEFAULT_PATH))
+        return _indexer
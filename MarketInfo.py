@@ -0,0 +1,87 @@
+import numpy as np
+from eth_utils import to_checksum_address
+from Multicall import Call
+
+UNISWAP_V2_FACTORY = '0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f'
+WETH = '0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2'
+# USDC/WETH pair used for the ETH price, token0 is USDC (6 decimals) and token1 is WETH
+USDC_WETH_PAIR = '0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc'
+ZERO_ADDRESS = '0x' + '0' * 40
+
+RESERVES_TYPE = '(uint112,uint112,uint32)'
+
+# Finds each token's WETH pair through the factory, tokens without a pair map to None
+def find_pairs(reader, tokens):
+    results = reader.read([Call(UNISWAP_V2_FACTORY, 'getPair(address,address)', 'address', ['address', 'address'], [token, WETH]) for token in tokens])
+    return {token: (result.value if result.success and result.value != ZERO_ADDRESS else None) for token, result in zip(tokens, results)}
+
+# Reads reserves, token0, token decimals and total supply for many pairs, plus the ETH price pair, in one batch
+def read_pairs(reader, pairs):
+    calls = [Call(USDC_WETH_PAIR, 'getReserves()', RESERVES_TYPE)]
+    for token, pair in pairs.items():
+        calls += [
+            Call(pair, 'getReserves()', RESERVES_TYPE),
+            Call(pair, 'token0()', 'address'),
+            Call(token, 'decimals()', 'uint8'),
+            Call(token, 'totalSupply()', 'uint256'),
+        ]
+    results = reader.read(calls)
+    eth_reserves = results[0]
+    rows = {}
+    for i, token in enumerate(pairs):
+        reserves, token0, decimals, supply = results[1 + 4 * i:5 + 4 * i]
+        if not (reserves.success and token0.success and supply.success):
+            continue
+        rows[token] = {
+            'reserves': reserves.value[:2],
+            'token_is_token0': to_checksum_address(token0.value) == token,
+            'decimals': decimals.value if decimals.success else 18,
+            'supply': supply.value,
+        }
+    return eth_reserves, rows
+
+# Computes price, liquidity and fully diluted valuation for a whole batch of pairs with array math
+def compute(eth_usd, token_reserves, weth_reserves, decimals, supplies):
+    scale = np.power(10.0, decimals)
+    token_amounts = token_reserves / scale
+    weth_amounts = weth_reserves / 1e18
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_eth = np.where(token_amounts > 0, weth_amounts / token_amounts, 0.0)
+    price_usd = price_eth * eth_usd
+    # Both sides of a V2 pool hold equal value, so liquidity is twice the WETH side
+    liquidity_usd = 2 * weth_amounts * eth_usd
+    fdv_usd = price_usd * (supplies / scale)
+    return price_usd, liquidity_usd, fdv_usd
+
+# Returns {token: {'pair', 'price_usd', 'liquidity_usd', 'fdv_usd'}} for many tokens, None for tokens without a WETH pair
+# pairs from an earlier find_pairs call of the same tokens saves looking them up again
+def market_info(reader, tokens, pairs=None):
+    tokens = [to_checksum_address(token) for token in tokens]
+    if pairs is None:
+        pairs = find_pairs(reader, tokens)
+    found = {token: pair for token, pair in pairs.items() if pair}
+    info = {token: None for token in tokens}
+    if not found:
+        return info
+    eth_reserves, rows = read_pairs(reader, found)
+    if not eth_reserves.success or not rows:
+        return info
+    usdc, weth = eth_reserves.value[:2]
+    eth_usd = (usdc / 1e6) / (weth / 1e18)
+
+    # Python ints above 2**64 do not fit numpy integer types, so reserves are converted to floats first
+    ordered = list(rows)
+    token_reserves = np.array([float(rows[t]['reserves'][0] if rows[t]['token_is_token0'] else rows[t]['reserves'][1]) for t in ordered])
+    weth_reserves = np.array([float(rows[t]['reserves'][1] if rows[t]['token_is_token0'] else rows[t]['reserves'][0]) for t in ordered])
+    decimals = np.array([rows[t]['decimals'] for t in ordered], dtype=float)
+    supplies = np.array([float(rows[t]['supply']) for t in ordered])
+    price_usd, liquidity_usd, fdv_usd = compute(eth_usd, token_reserves, weth_reserves, decimals, supplies)
+
+    for i, token in enumerate(ordered):
+        info[token] = {
+            'pair': found[token],
+            'price_usd': float(price_usd[i]),
+            'liquidity_usd': float(liquidity_usd[i]),
+            'fdv_usd': float(fdv_usd[i]),
+        }
+    return info
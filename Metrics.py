@@ -0,0 +1,252 @@
+import atexit
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket catches everything slower
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+PREFIX = 'checker_'
+
+# cProfile or pyinstrument, set from CHECKER_PROFILE or a command line flag
+PROFILER = os.getenv('CHECKER_PROFILE')
+
+# Name of the span the current code runs inside, recorded as the parent of nested spans
+_parent = contextvars.ContextVar('span', default=None)
+
+# Cumulative histogram of observed values, kept as plain bucket counts so observing is a bisect and an increment
+class Histogram():
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    # Approximate quantile, the upper bound of the bucket it falls in
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+# This class holds every counter, gauge and histogram of the process, cheap enough to stay on in production
+class MetricsRegistry():
+    def __init__(self, enabled=True, events_path=None):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.events = open(events_path, 'a', encoding='utf-8') if events_path else None
+
+    # Adds value to a counter, labels become Prometheus labels
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    # Sets a gauge to the current value of something that goes up and down, such as the size of a queue or a list
+    def gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+
+    # Records a value, normally a duration in seconds, in a histogram
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    # Times the block into the <name>_seconds histogram, counts <name>_errors_total and streams the span when a JSONL file is set
+    @contextmanager
+    def span(self, name, **labels):
+        if not self.enabled:
+            yield
+            return
+        parent = _parent.get()
+        token = _parent.set(name)
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            _parent.reset(token)
+            self.observe(name + '_seconds', duration, **labels)
+            if error is not None:
+                self.count(name + '_errors_total', **labels)
+            if self.events is not None:
+                self.write_event({'ts': round(time.time(), 6), 'span': name, 'parent': parent, 'labels': labels, 'duration': round(duration, 6), 'error': error})
+
+    def write_event(self, event):
+        line = json.dumps(event, default=str) + "\n"
+        with self.lock:
+            self.events.write(line)
+            self.events.flush()
+
+    # All counters, gauges and histograms as a JSON serializable dict
+    def snapshot(self):
+        with self.lock:
+            return {
+                'ts': round(time.time(), 3),
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in sorted(self.counters.items())],
+                'gauges': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in sorted(self.gauges.items())],
+                'histograms': [{
+                    'name': name,
+                    'labels': dict(labels),
+                    'count': histogram.count,
+                    'sum': round(histogram.sum, 6),
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'p99': histogram.quantile(0.99),
+                } for (name, labels), histogram in sorted(self.histograms.items())],
+            }
+
+    # Appends the current snapshot to a JSON lines file
+    def write_jsonl(self, path):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.snapshot()) + "\n")
+
+    # Counters, gauges and histograms in the Prometheus text exposition format
+    def prometheus(self):
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = PREFIX + name
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric}{format_labels(labels)} {value}")
+            for (name, labels), value in sorted(self.gauges.items()):
+                metric = PREFIX + name
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric}{format_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                metric = PREFIX + name
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f"{metric}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{metric}_sum{format_labels(labels)} {histogram.sum}")
+                lines.append(f"{metric}_count{format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+# Process-wide registry, CHECKER_METRICS=0 turns it off and CHECKER_METRICS_JSONL streams every span to a file
+registry = MetricsRegistry(enabled=os.getenv('CHECKER_METRICS', '1') != '0', events_path=os.getenv('CHECKER_METRICS_JSONL'))
+
+count = registry.count
+gauge = registry.gauge
+observe = registry.observe
+span = registry.span
+
+# Decorator form of span for functions that are timed as a whole
+def timed(name, **labels):
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with registry.span(name, **labels):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# cProfile on Python 3.12+ and pyinstrument allow one active profiler per process, so only one block is profiled at a time
+_profile_lock = threading.Lock()
+
+# Starts a profiler and returns a function that stops it and writes its file
+def _start_profiler(profiler, path):
+    if profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+        profile = Profiler()
+        profile.start()
+
+        def stop():
+            profile.stop()
+            with open(path + '.html', 'w', encoding='utf-8') as f:
+                f.write(profile.output_html())
+        return stop
+    import cProfile
+    profile = cProfile.Profile()
+    profile.enable()
+
+    def stop():
+        profile.disable()
+        profile.dump_stats(path + '.prof')
+    return stop
+
+# Profiles the block with cProfile or pyinstrument when PROFILER is set, writing one file per block to CHECKER_PROFILE_DIR
+# Blocks that start while another one is profiled, e.g. checks running on other threads, run unprofiled and are counted in profile_skipped_total
+@contextmanager
+def profiled(name, profiler=None):
+    profiler = profiler or PROFILER
+    if not profiler:
+        yield
+        return
+    if not _profile_lock.acquire(blocking=False):
+        registry.count('profile_skipped_total', check=name)
+        yield
+        return
+    try:
+        directory = os.getenv('CHECKER_PROFILE_DIR', 'profiles')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{threading.get_ident()}")
+        try:
+            stop = _start_profiler(profiler, path)
+        except (ValueError, RuntimeError):
+            # Another profiling tool is active, such as python -m cProfile around the whole program
+            registry.count('profile_skipped_total', check=name)
+            stop = None
+        try:
+            yield
+        finally:
+            if stop is not None:
+                stop()
+    finally:
+        _profile_lock.release()
+
+# CHECKER_METRICS_PROM writes the Prometheus text file when the process exits, e.g. for the node exporter textfile collector
+if os.getenv('CHECKER_METRICS_PROM'):
+    atexit.register(lambda: registry.write_prometheus(os.getenv('CHECKER_METRICS_PROM')))
@@ -0,0 +1,109 @@
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+from Rpc import RpcError
+import Metrics
+
+# Multicall3 is deployed at the same address on mainnet and most other chains
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+AGGREGATE3_SELECTOR = function_signature_to_4byte_selector('aggregate3((address,bool,bytes)[])')
+
+# Token reads collected for every token: field name -> (function signature, return type)
+TOKEN_FIELDS = {
+    'name': ('name()', 'string'),
+    'symbol': ('symbol()', 'string'),
+    'decimals': ('decimals()', 'uint8'),
+    'totalSupply': ('totalSupply()', 'uint256'),
+    'owner': ('owner()', 'address'),
+    'getOwner': ('getOwner()', 'address'),
+}
+
+# Outcome of one sub-call, a failed call keeps the reason in error
+class CallResult():
+    def __init__(self, success, value=None, error=None):
+        self.success = success
+        self.value = value
+        self.error = error
+
+    def __repr__(self):
+        return f"CallResult(success={self.success!r}, value={self.value!r}, error={self.error!r})"
+
+# A read-only contract call: target address, 4-byte selector plus encoded arguments, and the return type
+class Call():
+    def __init__(self, target, signature, output_type, args_types=(), args=()):
+        self.target = to_checksum_address(target)
+        self.output_type = output_type
+        self.data = function_signature_to_4byte_selector(signature) + (encode(list(args_types), list(args)) if args_types else b'')
+
+# Decodes return data, falling back to bytes32 for old tokens such as MKR that return name and symbol as bytes32
+def decode_output(output_type, data):
+    if not data:
+        return CallResult(False, error="Empty return data")
+    try:
+        value = decode([output_type], data)[0]
+    except Exception as e:
+        if output_type == 'string' and len(data) == 32:
+            return CallResult(True, data.rstrip(b'\x00').decode('utf-8', 'replace'))
+        return CallResult(False, error=f"Could not decode return data: {e}")
+    if output_type == 'address':
+        value = to_checksum_address(value)
+    return CallResult(True, value)
+
+# This class reads many contract calls in one round trip, either through Multicall3 or a JSON-RPC batch of eth_call
+class BatchReader():
+    def __init__(self, client, mode='multicall', max_calls=500, block='latest'):
+        if mode not in ('multicall', 'batch'):
+            raise ValueError(f"Unknown batch mode {mode!r}")
+        self.client = client
+        self.mode = mode
+        self.max_calls = max_calls
+        self.block = block
+
+    # Runs the calls and returns one CallResult per call, in order
+    def read(self, calls):
+        Metrics.count('batched_reads_total', len(calls), mode=self.mode)
+        results = []
+        for start in range(0, len(calls), self.max_calls):
+            chunk = calls[start:start + self.max_calls]
+            if self.mode == 'multicall':
+                results.extend(self._read_multicall(chunk))
+            else:
+                results.extend(self._read_batch(chunk))
+        return results
+
+    def _read_multicall(self, calls):
+        data = AGGREGATE3_SELECTOR + encode(['(address,bool,bytes)[]'], [[(call.target, True, call.data) for call in calls]])
+        try:
+            reply = self.client.call('eth_call', [{'to': MULTICALL3_ADDRESS, 'data': '0x' + data.hex()}, self.block])
+        except RpcError as e:
+            # The aggregate call itself failed, for example when the node limits gas per call
+            if e.code in (-32000, -32601, -32602):
+                return self._read_batch(calls)
+            raise
+        if not reply or reply == '0x':
+            # Multicall3 is not deployed on this chain, fall back to a JSON-RPC batch
+            return self._read_batch(calls)
+        returned = decode(['(bool,bytes)[]'], bytes.fromhex(reply[2:]))[0]
+        results = []
+        for call, (success, return_data) in zip(calls, returned):
+            results.append(decode_output(call.output_type, return_data) if success else CallResult(False, error="Call reverted"))
+        return results
+
+    def _read_batch(self, calls):
+        replies = self.client.batch([('eth_call', [{'to': call.target, 'data': '0x' + call.data.hex()}, self.block]) for call in calls])
+        results = []
+        for call, reply in zip(calls, replies):
+            if isinstance(reply, RpcError):
+                results.append(CallResult(False, error=str(reply)))
+            else:
+                results.append(decode_output(call.output_type, bytes.fromhex(reply[2:]) if reply else b''))
+        return results
+
+    # Reads the TOKEN_FIELDS of many tokens at once, returning {address: {field: CallResult}}
+    def read_tokens(self, addresses, fields=TOKEN_FIELDS):
+        addresses = [to_checksum_address(address) for address in addresses]
+        keys = [(address, field) for address in addresses for field in fields]
+        calls = [Call(address, *fields[field]) for address, field in keys]
+        tokens = {address: {} for address in addresses}
+        for (address, field), result in zip(keys, self.read(calls)):
+            tokens[address][field] = result
+        return tokens
@@ -0,0 +1,181 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager, nullcontext
+import Deadline
+import Metrics
+import Registry
+
+# Default list of checks run for a token, in the order they are displayed
+DEFAULT_CHECKS = Registry.PROFILES['full']['checks']
+
+# Backend each check mostly waits on, used for per-backend concurrency limits
+CHECK_BACKENDS = {name: check.cost for name, check in Registry.CHECKS.items()}
+
+# Seconds each check may run once it has its backend slot, CHECK_TIMEOUT overrides all of them
+CHECK_TIMEOUTS = {name: check.timeout for name, check in Registry.CHECKS.items()}
+
+# Seconds the whole analysis of one token may take, set ANALYSIS_TIMEOUT=0 for no limit
+ANALYSIS_TIMEOUT = float(os.getenv('ANALYSIS_TIMEOUT', 120))
+
+# Longest the orchestrator waits before looking at the deadlines again
+CANCEL_POLL = 0.25
+
+TIMED_OUT = "Timed out"
+CANCELLED = "Cancelled"
+
+# Reported in place of a check that ran out of time or was cancelled
+def deadline_message(deadline):
+    return CANCELLED if deadline.reason == "cancelled" else TIMED_OUT
+
+# Per check run and timeout counts for every orchestrator in the process, used to tune CHECK_TIMEOUTS
+class TimeoutStats():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checks = {}
+
+    # stopped is None for a check that finished, TIMED_OUT or CANCELLED otherwise, a cancel by the user is not counted as a timeout
+    def record(self, name, elapsed, stopped=None):
+        Metrics.count('check_runs_total', check=name)
+        if stopped == TIMED_OUT:
+            Metrics.count('check_timeouts_total', check=name)
+        elif stopped == CANCELLED:
+            Metrics.count('check_cancels_total', check=name)
+        with self.lock:
+            entry = self.checks.setdefault(name, {'runs': 0, 'timeouts': 0, 'cancels': 0, 'slowest': 0.0})
+            entry['runs'] += 1
+            if stopped == TIMED_OUT:
+                entry['timeouts'] += 1
+            elif stopped == CANCELLED:
+                entry['cancels'] += 1
+            else:
+                entry['slowest'] = max(entry['slowest'], round(elapsed, 3))
+
+    def stats(self):
+        with self.lock:
+            return {name: dict(entry) for name, entry in self.checks.items()}
+
+timeout_stats = TimeoutStats()
+
+# This class limits how many checks may use each backend at the same time, it can be shared by many orchestrators
+class BackendLimiter():
+    def __init__(self, limits):
+        self.semaphores = {backend: threading.BoundedSemaphore(limit) for backend, limit in limits.items()}
+
+    # Holds a slot for the backend while the block runs, backends without a limit are not restricted
+    @contextmanager
+    def slot(self, backend):
+        semaphore = self.semaphores.get(backend)
+        if semaphore is None:
+            yield
+            return
+        with semaphore:
+            yield
+
+# This class runs the independent checks of an ERC20Checker concurrently, each within its own deadline
+class CheckOrchestrator():
+    def __init__(self, checker, max_workers=6, limiter=None, timeouts=None, total_timeout=ANALYSIS_TIMEOUT):
+        self.checker = checker
+        self.max_workers = max_workers
+        self.limiter = limiter
+        self.timeouts = dict(CHECK_TIMEOUTS, **(timeouts or {}))
+        if os.getenv('CHECK_TIMEOUT'):
+            self.timeouts = {name: float(os.getenv('CHECK_TIMEOUT')) for name in self.timeouts}
+        self.total_timeout = total_timeout or None
+        # Cancelling this deadline stops every check of the analysis, see cancel()
+        self.deadline = Deadline.Deadline()
+
+    # Stops the analysis, checks still running are reported as cancelled and their browsers are quit
+    def cancel(self):
+        self.deadline.cancel("cancelled")
+
+    # Slot for the backend when the orchestrator has a limiter
+    def slot(self, backend):
+        return self.limiter.slot(backend) if self.limiter else nullcontext()
+
+    # Waits for the inputs a check or input is built from, checking often enough to notice a cancel
+    # Failed inputs are not reported here, the check asks for the input again and handles the error itself
+    def await_inputs(self, futures, deadline):
+        pending = set(futures)
+        while pending and not deadline.expired():
+            _, pending = wait(pending, timeout=CANCEL_POLL)
+
+    # Fetches an input shared by several checks once, after the inputs it depends on
+    def fetch_input(self, name, dependencies, deadline):
+        self.await_inputs(dependencies, deadline)
+        entry = Registry.INPUTS[name]
+        with Deadline.scope(deadline), self.slot(entry.backend), Metrics.span('input', input=name):
+            Deadline.check()
+            return getattr(self.checker, entry.method)()
+
+    # Runs a single check and turns any exception into a readable result
+    # The check's inputs are awaited before it takes a backend slot, so a waiting check never holds one
+    def run_check(self, function_name, deadline=None, inputs=()):
+        deadline = deadline or Deadline.Deadline(parent=self.deadline)
+        try:
+            self.await_inputs(inputs, deadline)
+            with Deadline.scope(deadline), self.slot(CHECK_BACKENDS.get(function_name)):
+                result = self._call(function_name, deadline)
+            # A check that swallowed the error from its quit browser or cut-short request still reports the timeout
+            if deadline.expired():
+                return deadline_message(deadline), Deadline.DeadlineExceeded(deadline.reason or "timeout")
+            return result, None
+        except Exception as e:
+            # Errors caused by quitting a browser or cutting a request short are reported as the timeout they are
+            if deadline.expired():
+                return deadline_message(deadline), e
+            return f"Check failed: {e}", e
+
+    # Starts the check's clock once it may run, the check is timed and, when enabled, profiled
+    def _call(self, function_name, deadline):
+        deadline.start()
+        Deadline.check()
+        with Metrics.span('check', check=function_name), Metrics.profiled(function_name):
+            return getattr(self.checker, function_name)()
+
+    # Runs the given checks at the same time, calling on_result(index, name, result, error) as each one finishes
+    # Inputs shared by several checks are fetched first, once, in dependency order from the registry
+    # A check that overruns is cancelled and reported without waiting for its thread, so the rest of the report completes
+    def run(self, function_names=DEFAULT_CHECKS, on_result=None):
+        results = {}
+        overall = Deadline.Deadline(self.total_timeout, parent=self.deadline)
+        plan = Registry.plan(function_names)
+        # Inputs get threads of their own on top of max_workers, they are submitted first so no check waits on an input that cannot start
+        executor = ThreadPoolExecutor(max_workers=max(1, self.max_workers) + len(plan))
+        try:
+            inputs = {}
+            for name in plan:
+                dependencies = [inputs[dependency] for dependency in Registry.INPUTS[name].depends]
+                inputs[name] = executor.submit(self.fetch_input, name, dependencies, Deadline.Deadline(parent=overall))
+            futures = {}
+            for i, name in enumerate(function_names):
+                deadline = Deadline.Deadline(self.timeouts.get(name), parent=overall, started=False)
+                check_inputs = [inputs[input_name] for input_name in Registry.plan([name])]
+                futures[executor.submit(self.run_check, name, deadline, check_inputs)] = (i, name, deadline)
+            pending = set(futures)
+            while pending:
+                # Wake up at the nearest deadline, or often enough to notice a cancel from the GUI
+                remaining = [left for left in (futures[future][2].remaining() for future in pending) if left is not None]
+                done, _ = wait(pending, timeout=min([CANCEL_POLL] + [max(0.0, left) + 0.01 for left in remaining]), return_when=FIRST_COMPLETED)
+                finished = []
+                for future in done:
+                    i, name, deadline = futures[future]
+                    result, error = future.result()
+                    stopped = isinstance(error, Deadline.DeadlineExceeded) or deadline.expired()
+                    finished.append((future, i, name, result, error, deadline_message(deadline) if stopped else None))
+                for future in pending - done:
+                    i, name, deadline = futures[future]
+                    if deadline.expired():
+                        # The cleanup callbacks quit the check's browser, its thread is left to unwind on its own
+                        deadline.cancel("timeout")
+                        finished.append((future, i, name, deadline_message(deadline), Deadline.DeadlineExceeded(deadline.reason), deadline_message(deadline)))
+                for future, i, name, result, error, stopped in finished:
+                    pending.discard(future)
+                    deadline = futures[future][2]
+                    timeout_stats.record(name, deadline.elapsed(), stopped)
+                    results[name] = result
+                    if on_result:
+                        on_result(i, name, result, error)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+from urllib.parse import urlparse
+import Deadline
+
+# Requests per second and burst size for the hosts the checks talk to
+DEFAULT_LIMITS = {
+    'api.etherscan.io': (5, 5),
+    'etherscan.io': (0.5, 1),
+    'honeypot.is': (1, 2),
+    'api.honeypot.is': (2, 4),
+    'www.dextools.io': (0.5, 1),
+    'mainnet.infura.io': (10, 20),
+}
+FALLBACK_LIMIT = (5, 5)
+
+# Budget of an Ethereum node set with ETH_RPC_URL that has no entry above, RPC_RATE_LIMIT overrides it as "rate/burst"
+RPC_LIMIT = (100, 200)
+
+# Text that shows a scraped page is a bot challenge rather than the real content
+CHALLENGE_MARKERS = ('Just a moment...', 'cf-chl', 'Attention Required!', 'challenge-platform', 'Checking your browser')
+
+# Returns True if an HTML page looks like a Cloudflare style challenge page
+def is_challenge_page(html):
+    return any(marker in html for marker in CHALLENGE_MARKERS)
+
+# Token bucket for one host, the rate halves when the host throttles us and creeps back up on success
+class TokenBucket():
+    def __init__(self, rate, burst, min_rate=None, increase=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.increase = increase or rate / 20
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.waiting = 0
+        self.requests = 0
+        self.throttled = 0
+        self.wait_time = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Takes a token and returns how long the caller has to wait for it, callers queue up in order
+    def reserve(self):
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        self.requests += 1
+        delay = max(0.0, -self.tokens / self.rate, self.paused_until - now)
+        return delay
+
+    # Gives back a token reserved for a request that is never sent
+    def release(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+        self.requests -= 1
+
+    def on_throttle(self, retry_after=None):
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+# This class paces requests per host, only delaying a request when that host's budget is used up
+class HostRateLimiter():
+    def __init__(self, limits=DEFAULT_LIMITS, fallback=FALLBACK_LIMIT):
+        self.limits = dict(limits)
+        self.fallback = fallback
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, host):
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            rate, burst = self.limits.get(host, self.fallback)
+            bucket = self.buckets[host] = TokenBucket(rate, burst)
+        return bucket
+
+    # Blocks until the host has budget for one more request, returns the time spent waiting
+    # Inside a check the wait never outlasts its deadline: when it would, or when the check is cancelled while waiting,
+    # the token is given back for live requests and DeadlineExceeded is raised
+    def acquire(self, url_or_host):
+        Deadline.check()
+        host = host_of(url_or_host)
+        deadline = Deadline.current()
+        left = Deadline.remaining()
+        with self.lock:
+            bucket = self._bucket(host)
+            delay = bucket.reserve()
+            if left is not None and delay > left:
+                bucket.release()
+                raise Deadline.DeadlineExceeded(f"Waiting {delay:.1f}s for the {host} rate limit would outlast the deadline")
+            bucket.waiting += 1
+        started = time.monotonic()
+        cancelled = threading.Event()
+        unregister = deadline.on_cancel(cancelled.set) if deadline is not None and delay > 0 else None
+        try:
+            if delay > 0 and cancelled.wait(delay):
+                with self.lock:
+                    bucket.release()
+                raise Deadline.DeadlineExceeded(f"Deadline {deadline.reason or 'expired'} while waiting for the {host} rate limit")
+        finally:
+            if unregister is not None:
+                unregister()
+            with self.lock:
+                bucket.waiting -= 1
+                bucket.wait_time += time.monotonic() - started
+        return delay
+
+    # Reports a 429, rate limit message or challenge page so the host is slowed down
+    def throttled(self, url_or_host, retry_after=None):
+        with self.lock:
+            self._bucket(host_of(url_or_host)).on_throttle(retry_after)
+
+    # Reports a normal response so a throttled host can speed back up
+    def succeeded(self, url_or_host):
+        with self.lock:
+            self._bucket(host_of(url_or_host)).on_success()
+
+    # Per host request counts, current rate, queue depth and total wait time
+    def stats(self):
+        with self.lock:
+            return {host: {
+                'requests': bucket.requests,
+                'throttled': bucket.throttled,
+                'rate': round(bucket.rate, 3),
+                'queue_depth': bucket.waiting,
+                'wait_time': round(bucket.wait_time, 3),
+            } for host, bucket in self.buckets.items()}
+
+# Host name of a URL, plain host names are returned unchanged
+def host_of(url_or_host):
+    if '://' in url_or_host:
+        return urlparse(url_or_host).hostname or url_or_host
+    return url_or_host
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+# Parses "rate/burst" into (rate, burst), the burst defaults to 1
+def parse_limit(value):
+    rate, _, burst = value.partition('/')
+    return float(rate), float(burst or 1)
+
+# Returns the process-wide limiter, RATE_LIMITS can override hosts as "host=rate/burst,host=rate/burst"
+# The Ethereum node gets its own budget, so the log scans and batched calls to a custom node are not held to FALLBACK_LIMIT
+def get_limiter():
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            import Clients
+            limits = dict(DEFAULT_LIMITS)
+            rpc_host = host_of(Clients.rpc_url())
+            if os.getenv('RPC_RATE_LIMIT'):
+                limits[rpc_host] = parse_limit(os.getenv('RPC_RATE_LIMIT'))
+            else:
+                limits.setdefault(rpc_host, RPC_LIMIT)
+            for entry in filter(None, os.getenv('RATE_LIMITS', '').split(',')):
+                host, _, value = entry.partition('=')
+                limits[host.strip()] = parse_limit(value)
+            _limiter = HostRateLimiter(limits)
+        return _limiter
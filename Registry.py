@@ -0,0 +1,124 @@
+import importlib
+
+# Modules each backend needs, imported only once a selected check uses the backend
+BACKEND_MODULES = {
+    'rpc': ['Multicall'],
+    'etherscan': ['Cache', 'RuleEngine'],
+    'bytecode': ['Bytecode'],
+    'holders': ['HolderIndex'],
+    'market': ['MarketInfo'],
+    'http': ['FetchBackends', 'Extractors'],
+    'driver': ['DriverPool'],
+}
+
+# A value shared by several checks, fetched once per token by the named ERC20Checker method
+# depends lists the inputs it is built from, so they are fetched first
+class Input():
+    def __init__(self, name, method, backend, depends=()):
+        self.name = name
+        self.method = method
+        self.backend = backend
+        self.depends = tuple(depends)
+
+INPUTS = {entry.name: entry for entry in [
+    Input('token_info', 'token_info', 'rpc'),
+    Input('source', 'get_contract_source_code', 'etherscan'),
+    # getsourcecode answers with the ABI too, so once the source is fetched the ABI comes from the cache
+    Input('abi', 'get_contract_abi', 'etherscan', depends=('source',)),
+]}
+
+# A check, its label in the GUI, the inputs it reads and the backends it uses
+# optional backends are only used on a fallback path, cost is the backend whose concurrency limit the check counts against
+class Check():
+    def __init__(self, name, label, inputs=(), backends=(), optional=(), cost='rpc', timeout=30):
+        self.name = name
+        self.label = label
+        self.inputs = tuple(inputs)
+        self.backends = tuple(backends)
+        self.optional = tuple(optional)
+        self.cost = cost
+        self.timeout = timeout
+
+    # True if the check cannot give a result without a headless browser
+    def needs_browser(self):
+        return 'driver' in self.backends
+
+    # True if the check always reads a scraped site
+    def scrapes(self):
+        return 'http' in self.backends or self.needs_browser()
+
+# Every check, in the order they are displayed
+CHECKS = {check.name: check for check in [
+    Check('get_name', ' Name ', inputs=('token_info',), backends=('rpc',), timeout=20),
+    Check('is_ownership_renounced_or_no_owner', ' Owner ', inputs=('token_info',), backends=('rpc',), timeout=20),
+    Check('check_scam_patterns', ' Contract ', inputs=('source',), backends=('etherscan',), optional=('bytecode',), cost='etherscan', timeout=30),
+    # Scraped pages are fetched over plain HTTP and only rendered in a browser when that fails, so the browser limit is left to the driver pool
+    Check('scrape_honeypot', ' Honeypot ', backends=('http',), optional=('driver',), cost='http', timeout=45),
+    Check('market_cap', ' Market Info ', backends=('rpc', 'market'), optional=('http', 'driver'), timeout=45),
+    Check('get_top_holders', ' Top 10 Holders ', inputs=('token_info',), backends=('rpc', 'holders'), optional=('http', 'driver'), timeout=60),
+]}
+
+# Named sets of checks and the ERC20Checker options they run with
+# browserless scrapes over plain HTTP only, onchain never scrapes, neither of them imports selenium
+PROFILES = {
+    'full': {'checks': list(CHECKS), 'options': {'use_browser': True, 'scrape': True}},
+    'browserless': {'checks': [name for name, check in CHECKS.items() if not check.needs_browser()], 'options': {'use_browser': False, 'scrape': True}},
+    'onchain': {'checks': [name for name, check in CHECKS.items() if not check.scrapes()], 'options': {'use_browser': False, 'scrape': False}},
+}
+
+def labels(check_names):
+    return [CHECKS[name].label for name in check_names]
+
+# Returns the names that are not registered checks
+def unknown(check_names):
+    return [name for name in check_names if name not in CHECKS]
+
+# Why the profile cannot run the checks, None when it can: a check needs a browser or scraping the profile turns off
+def unsupported(check_names, profile_name):
+    options = PROFILES[profile_name]['options']
+    browser_checks = [name for name in check_names if CHECKS[name].needs_browser()]
+    if browser_checks and not options['use_browser']:
+        return f"The {profile_name} profile does not use a browser, which {', '.join(browser_checks)} needs"
+    scraping_checks = [name for name in check_names if CHECKS[name].scrapes()]
+    if scraping_checks and not options['scrape']:
+        return f"The {profile_name} profile does not scrape, which {', '.join(scraping_checks)} needs"
+    return None
+
+# Inputs the checks read, each listed once and after the inputs it depends on, unregistered checks read none
+def plan(check_names):
+    order = []
+    visiting = set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"Input {name} depends on itself")
+        visiting.add(name)
+        for dependency in INPUTS[name].depends:
+            visit(dependency)
+        visiting.discard(name)
+        order.append(name)
+
+    for check_name in check_names:
+        check = CHECKS.get(check_name)
+        for input_name in (check.inputs if check else ()):
+            visit(input_name)
+    return order
+
+# Backends the checks may use with the given ERC20Checker options, scraping fallbacks only when scraping and the browser are allowed
+def backends(check_names, use_browser=True, scrape=True):
+    allowed = {'http': scrape, 'driver': scrape and use_browser}
+    needed = set()
+    for name in check_names:
+        check = CHECKS[name]
+        needed.update(check.backends)
+        needed.update(backend for backend in check.optional if allowed.get(backend, True))
+    needed.update(INPUTS[name].backend for name in plan(check_names))
+    return needed
+
+# Imports the backends up front, so the first token of a long run does not pay for the imports
+def load_backends(check_names, use_browser=True, scrape=True):
+    for backend in sorted(backends(check_names, use_browser, scrape)):
+        for module in BACKEND_MODULES.get(backend, []):
+            importlib.import_module(module)
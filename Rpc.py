@@ -0,0 +1,76 @@
+import itertools
+import threading
+import requests
+import Metrics
+
+# Error returned by the node for a JSON-RPC request
+class RpcError(Exception):
+    def __init__(self, code, message, data=None):
+        super().__init__(f"{message} (code {code})")
+        self.code = code
+        self.message = message
+        self.data = data
+
+# This class is a minimal JSON-RPC client supporting single and batched requests
+class JsonRpcClient():
+    def __init__(self, url, session=None, timeout=30):
+        self.url = url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.ids = itertools.count(1)
+        self.ids_lock = threading.Lock()
+        self.batch_supported = True
+
+    def _next_id(self):
+        with self.ids_lock:
+            return next(self.ids)
+
+    def _post(self, payload):
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    # Sends one request and returns its result, raising RpcError if the node answered with an error
+    def call(self, method, params=None):
+        Metrics.count('rpc_calls_total', method=method)
+        with Metrics.span('rpc', method=method):
+            reply = self._post({'jsonrpc': '2.0', 'id': self._next_id(), 'method': method, 'params': params or []})
+        if 'error' in reply:
+            error = reply['error']
+            Metrics.count('rpc_errors_total', method=method)
+            raise RpcError(error.get('code'), error.get('message'), error.get('data'))
+        return reply.get('result')
+
+    # Sends many requests in one HTTP round trip, the list returned holds a result or an RpcError for each call, in order
+    def batch(self, calls):
+        if not calls:
+            return []
+        if not self.batch_supported:
+            return [self._call_or_error(method, params) for method, params in calls]
+        for method, _ in calls:
+            Metrics.count('rpc_calls_total', method=method)
+        ids = [self._next_id() for _ in calls]
+        with Metrics.span('rpc', method='batch'):
+            replies = self._post([{'jsonrpc': '2.0', 'id': id, 'method': method, 'params': params or []} for id, (method, params) in zip(ids, calls)])
+        if not isinstance(replies, list):
+            # Nodes without batch support answer with a single error, fall back to one request per call
+            self.batch_supported = False
+            return [self._call_or_error(method, params) for method, params in calls]
+        by_id = {reply.get('id'): reply for reply in replies}
+        results = []
+        for id in ids:
+            reply = by_id.get(id)
+            if reply is None:
+                results.append(RpcError(None, "Missing reply in batch response"))
+            elif 'error' in reply:
+                error = reply['error']
+                results.append(RpcError(error.get('code'), error.get('message'), error.get('data')))
+            else:
+                results.append(reply.get('result'))
+        return results
+
+    def _call_or_error(self, method, params):
+        try:
+            return self.call(method, params)
+        except RpcError as e:
+            return e
@@ -0,0 +1,154 @@
+import json
+import os
+import re
+import threading
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scam_rules.json')
+
+# A single scam rule loaded from the rules file
+class Rule():
+    def __init__(self, id, pattern, type='literal', severity='medium', description=None, ignore_case=False):
+        if type not in ('literal', 'regex'):
+            raise ValueError(f"Rule {id} has unknown type {type!r}")
+        self.id = id
+        self.pattern = pattern
+        self.type = type
+        self.severity = severity
+        self.description = description or pattern
+        self.ignore_case = ignore_case
+
+    # Regex source for the rule, literal rules are escaped so characters such as parentheses match as written
+    def regex(self):
+        source = re.escape(self.pattern) if self.type == 'literal' else self.pattern
+        return f"(?i:{source})" if self.ignore_case else source
+
+# A rule match, offsets and line numbers are relative to the source file it was found in
+class Hit():
+    def __init__(self, rule, file, offset, line, text):
+        self.rule = rule
+        self.file = file
+        self.offset = offset
+        self.line = line
+        self.text = text
+
+    def to_dict(self):
+        return {'rule': self.rule.id, 'severity': self.rule.severity, 'file': self.file, 'offset': self.offset, 'line': self.line, 'text': self.text}
+
+# Splits Etherscan's SourceCode field into (file name, content) pairs, handling single files and both multi-file JSON formats
+def split_sources(source_code, default_name='Contract.sol'):
+    text = source_code.strip()
+    if not text.startswith('{'):
+        return [(default_name, source_code)]
+    # Standard JSON input is wrapped in an extra pair of braces: {{ "language": ..., "sources": {...} }}
+    if text.startswith('{{') and text.endswith('}}'):
+        text = text[1:-1]
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return [(default_name, source_code)]
+    sources = data.get('sources', data) if isinstance(data, dict) else None
+    if not isinstance(sources, dict):
+        return [(default_name, source_code)]
+    files = [(name, entry.get('content', '')) for name, entry in sources.items() if isinstance(entry, dict)]
+    return files or [(default_name, source_code)]
+
+# Builds a regex for a list of literals with shared prefixes factored out, so the regex engine does not retry every literal at every position
+def trie_regex(literals):
+    trie = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        if '' in node:
+            return '(?:' + '|'.join(branches) + ')?'
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return build(trie)
+
+# This class compiles a rule set into one matcher so a source file is scanned in a single pass
+class RuleSet():
+    def __init__(self, rules):
+        self.rules = list(rules)
+        ids = [rule.id for rule in self.rules]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Rule ids must be unique")
+        self.rule_regexes = {rule.id: re.compile(rule.regex()) for rule in self.rules}
+
+        # Literal rules go into prefix tries, regex rules are appended as alternatives
+        literals = [rule.pattern for rule in self.rules if rule.type == 'literal' and not rule.ignore_case and rule.pattern]
+        folded = [rule.pattern.lower() for rule in self.rules if rule.type == 'literal' and rule.ignore_case and rule.pattern]
+        parts = []
+        if literals:
+            parts.append(trie_regex(literals))
+        if folded:
+            parts.append(f"(?i:{trie_regex(folded)})")
+        parts.extend(f"(?:{rule.regex()})" for rule in self.rules if rule.type == 'regex')
+        self.matcher = re.compile('|'.join(parts)) if parts else None
+
+        # Rules that can start at a given character, used to tell which rules matched at a hit
+        self.literal_candidates = {}
+        self.regex_rules = [rule for rule in self.rules if rule.type == 'regex' or not rule.pattern]
+        for rule in self.rules:
+            if rule.type == 'literal' and rule.pattern:
+                first = rule.pattern[0]
+                for char in {first, first.lower(), first.upper()} if rule.ignore_case else {first}:
+                    self.literal_candidates.setdefault(char, []).append(rule)
+
+    # Loads a rule set from a JSON file of the form {"rules": [{"id", "type", "pattern", "severity", ...}]}
+    @classmethod
+    def load(cls, path=DEFAULT_RULES_PATH):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(Rule(**entry) for entry in data['rules'])
+
+    # Returns every hit in one file, the same hits as running each rule's regex over the file on its own
+    # Matches of different rules may overlap, matches of one rule do not, as with re.finditer
+    def scan_text(self, text, file='Contract.sol'):
+        hits = []
+        if self.matcher is None:
+            return hits
+        line = 1
+        last = 0
+        rule_ends = {}
+        match = self.matcher.search(text)
+        while match:
+            offset = match.start()
+            line += text.count('\n', last, offset)
+            last = offset
+            # Hits are rare, so only here are the individual rules that start at this offset checked
+            for rule in self.literal_candidates.get(text[offset], []) + self.regex_rules:
+                if offset < rule_ends.get(rule.id, 0):
+                    continue
+                found = self.rule_regexes[rule.id].match(text, offset)
+                if found:
+                    rule_ends[rule.id] = max(found.end(), offset + 1)
+                    hits.append(Hit(rule, file, offset, line, found.group()))
+            # The search resumes right after the start of this match rather than after its end, so a match inside or overlapping it is not skipped
+            match = self.matcher.search(text, offset + 1)
+        return hits
+
+    # Scans Etherscan source code, which may hold several files
+    def scan(self, source_code):
+        hits = []
+        for file, content in split_sources(source_code):
+            hits.extend(self.scan_text(content, file))
+        return hits
+
+_default_rules = None
+_default_rules_lock = threading.Lock()
+
+# Returns the rule set loaded from SCAM_RULES_PATH or the bundled scam_rules.json, compiled once per process
+def default_rules():
+    global _default_rules
+    with _default_rules_lock:
+        if _default_rules is None:
+            _default_rules = RuleSet.load(os.getenv('SCAM_RULES_PATH', DEFAULT_RULES_PATH))
+        return _default_rules
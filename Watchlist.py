@@ -0,0 +1,373 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from eth_utils import keccak, to_checksum_address
+import Checker
+import Clients
+import HolderIndex
+import MarketInfo
+import Metrics
+import Multicall
+import Orchestrator
+from Rpc import RpcError
+
+OWNERSHIP_TRANSFERRED_TOPIC = '0x' + keccak(text='OwnershipTransferred(address,address)').hex()
+SYNC_TOPIC = '0x' + keccak(text='Sync(uint112,uint112)').hex()
+PAIR_CREATED_TOPIC = '0x' + keccak(text='PairCreated(address,address,address,uint256)').hex()
+
+# Checks kept current for every token, the name is read once and the honeypot check is not followed either
+# No log the watchlist reads tells when a token's simulated taxes change, so keeping it current would mean asking the API for every token on every poll
+WATCHED_CHECKS = ['get_name', 'is_ownership_renounced_or_no_owner', 'check_scam_patterns', 'market_cap', 'get_top_holders']
+
+# Blocks between two re-evaluations of a token's holders, its balances are still folded in on every poll
+HOLDERS_INTERVAL = int(os.getenv('WATCH_HOLDERS_INTERVAL', 25))
+# Seconds between two source lookups of an unverified token, a verified token is never looked up again
+SOURCE_RECHECK = float(os.getenv('WATCH_SOURCE_RECHECK', 3600))
+# Blocks and addresses per eth_getLogs filter
+MAX_RANGE = int(os.getenv('WATCH_MAX_RANGE', 1000))
+ADDRESS_CHUNK = int(os.getenv('WATCH_ADDRESS_CHUNK', 500))
+# Share of liquidity that may leave a pool between two polls before it is reported as an alert
+LIQUIDITY_DROP_ALERT = float(os.getenv('WATCH_LIQUIDITY_DROP_ALERT', 0.5))
+
+# Words in a check result that make a new result an alert rather than a plain change
+ALERT_MARKERS = ('Warning', 'SCAM', 'NOT Renounced')
+
+def alarming(result):
+    return any(marker in str(result) for marker in ALERT_MARKERS)
+
+# True if the token's source is verified, None when Etherscan could not be asked, so the lookup is tried again on the next poll
+def source_verified(checker):
+    try:
+        return bool(checker.get_contract_source_code())
+    except Checker.SourceUnavailable:
+        return None
+
+# This class keeps the checks of many tokens current by following confirmed blocks
+# Only the checks whose inputs changed are run again: owner on OwnershipTransferred, holders on Transfer, market on the pair's Sync
+class Watchlist():
+    def __init__(self, client=None, workers=8, use_browser=False, holders_interval=HOLDERS_INTERVAL, source_recheck=SOURCE_RECHECK):
+        self.client = client or Clients.get_rpc()
+        self.reader = Multicall.BatchReader(self.client)
+        self.indexer = HolderIndex.get_indexer(self.client)
+        # Same confirmations as the holder index, so the Transfers folded in here continue its checkpoints
+        self.confirmations = self.indexer.confirmations
+        self.workers = workers
+        self.use_browser = use_browser
+        self.holders_interval = holders_interval
+        self.source_recheck = source_recheck
+        self.tokens = {}
+        self.by_address = {}
+        self.pairs = {}
+        self.block = None
+        self.covered_from = None
+        self.lock = threading.Lock()
+
+    # Latest block with enough confirmations
+    def head(self):
+        return int(self.client.call('eth_blockNumber'), 16) - self.confirmations
+
+    # Starts watching tokens, each is analyzed once in full with market info read for all of them in one batch, returns {address: results}
+    def add(self, addresses):
+        tokens = []
+        for address in addresses:
+            token = to_checksum_address(address)
+            if token not in self.tokens and token not in tokens:
+                tokens.append(token)
+        if self.block is None:
+            self.block = self.head()
+            self.covered_from = self.block + 1
+        if not tokens:
+            return {}
+        pairs = MarketInfo.find_pairs(self.reader, tokens)
+        infos = MarketInfo.market_info(self.reader, tokens, pairs)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            evaluated = list(executor.map(self.evaluate, tokens))
+        for token, (results, verified) in zip(tokens, evaluated):
+            info = infos.get(token)
+            results['market_cap'] = Checker.format_market_info(info)
+            with self.lock:
+                self.tokens[token] = {
+                    'results': {name: results.get(name) for name in WATCHED_CHECKS},
+                    'pair': pairs.get(token),
+                    'verified': verified,
+                    'source_checked': time.time(),
+                    'holders_block': self.block,
+                    # A holders check that ran out of time is tried again at the next holders interval
+                    'stale_holders': results.get('get_top_holders') in (Orchestrator.TIMED_OUT, Orchestrator.CANCELLED),
+                    'liquidity': info['liquidity_usd'] if info else 0.0,
+                }
+                self.by_address[token.lower()] = token
+                if pairs.get(token):
+                    self.pairs[pairs[token].lower()] = token
+        Metrics.gauge('watch_tokens', len(self.tokens))
+        return {token: self.tokens[token]['results'] for token in tokens}
+
+    def remove(self, address):
+        token = to_checksum_address(address)
+        with self.lock:
+            state = self.tokens.pop(token, None)
+            self.by_address.pop(token.lower(), None)
+            if state and state['pair']:
+                self.pairs.pop(state['pair'].lower(), None)
+            Metrics.gauge('watch_tokens', len(self.tokens))
+
+    # Full analysis of a new token except market info, returns (results, whether its source is verified or None if unknown)
+    def evaluate(self, token):
+        checker = Checker.ERC20Checker(token, use_browser=self.use_browser)
+        checks = [name for name in WATCHED_CHECKS if name != 'market_cap']
+        results = Orchestrator.CheckOrchestrator(checker, max_workers=len(checks)).run(checks)
+        return results, source_verified(checker)
+
+    # Addresses whose logs are followed: the tokens, their pairs and, while some token has no pair yet, the Uniswap V2 factory
+    def addresses(self):
+        with self.lock:
+            addresses = list(self.by_address) + list(self.pairs)
+            if any(state['pair'] is None for state in self.tokens.values()):
+                addresses.append(MarketInfo.UNISWAP_V2_FACTORY.lower())
+        return addresses
+
+    # Reads the followed logs of a block range in one JSON-RPC batch, one filter per chunk of addresses
+    # Halves the range when the node refuses it as too large, returns (logs, last block read)
+    def get_logs(self, start, end):
+        addresses = self.addresses()
+        topics = [[HolderIndex.TRANSFER_TOPIC, OWNERSHIP_TRANSFERRED_TOPIC, SYNC_TOPIC, PAIR_CREATED_TOPIC]]
+        while True:
+            calls = [('eth_getLogs', [{'address': addresses[i:i + ADDRESS_CHUNK], 'topics': topics, 'fromBlock': hex(start), 'toBlock': hex(end)}]) for i in range(0, len(addresses), ADDRESS_CHUNK)]
+            replies = self.client.batch(calls)
+            errors = [reply for reply in replies if isinstance(reply, RpcError)]
+            if not errors:
+                return [log for reply in replies for log in reply or []], end
+            if end == start or not any(marker in str(errors[0].message).lower() for marker in HolderIndex.RANGE_ERRORS):
+                raise errors[0]
+            end = start + (end - start) // 2
+
+    # Sorts logs into the checks they affect, returns ({token: set of checks}, {token: Transfer logs})
+    def route(self, logs):
+        touched = defaultdict(set)
+        transfers = defaultdict(list)
+        factory = MarketInfo.UNISWAP_V2_FACTORY.lower()
+        weth = MarketInfo.WETH.lower()
+        with self.lock:
+            for log in logs:
+                topics = log.get('topics') or []
+                if not topics:
+                    continue
+                address = log['address'].lower()
+                topic = topics[0].lower()
+                if address in self.pairs:
+                    if topic == SYNC_TOPIC:
+                        touched[self.pairs[address]].add('market_cap')
+                elif address == factory:
+                    if topic != PAIR_CREATED_TOPIC or len(topics) < 3:
+                        continue
+                    token0, token1 = ('0x' + topic_value[-40:] for topic_value in topics[1:3])
+                    other, token = (token0, self.by_address.get(token1)) if token1 in self.by_address else (token1, self.by_address.get(token0))
+                    if token is not None and other == weth and self.tokens[token]['pair'] is None:
+                        pair = to_checksum_address('0x' + log['data'][26:66])
+                        self.tokens[token]['pair'] = pair
+                        self.pairs[pair.lower()] = token
+                        touched[token].add('market_cap')
+                elif address in self.by_address:
+                    token = self.by_address[address]
+                    if topic == HolderIndex.TRANSFER_TOPIC:
+                        transfers[token].append(log)
+                        touched[token].add('get_top_holders')
+                    elif topic == OWNERSHIP_TRANSFERRED_TOPIC:
+                        touched[token].add('is_ownership_renounced_or_no_owner')
+        return touched, transfers
+
+    # Reads every block confirmed since the last poll and returns the resulting changes, see update()
+    def poll(self):
+        if self.block is None:
+            return []
+        head = self.head()
+        if head <= self.block:
+            return []
+        events = []
+        with Metrics.span('watch_poll'):
+            start = self.block + 1
+            while start <= head:
+                try:
+                    logs, end = self.get_logs(start, min(head, start + MAX_RANGE - 1))
+                except Exception:
+                    if not events:
+                        raise
+                    # The changes of the chunks already read are returned, the next poll continues after them
+                    break
+                touched, transfers = self.route(logs)
+                # Holder balances stay current without another eth_getLogs, a checkpoint too old to continue is caught up by the check
+                for token, token_logs in transfers.items():
+                    self.indexer.apply(token, token_logs, self.covered_from, end)
+                # Each chunk is acted on before the next one is read, so an error on a later chunk cannot lose its changes
+                events += self.reevaluate(touched, end)
+                self.block = end
+                start = end + 1
+            return events
+
+    # Runs the affected checks again, market info for all tokens in one batched read and the rest per token
+    def reevaluate(self, touched, head):
+        events = []
+        market = [token for token, checks in touched.items() if 'market_cap' in checks and token in self.tokens]
+        if market:
+            events += self.update_market(market, head)
+
+        now = time.time()
+        jobs = {}
+        with self.lock:
+            for token, state in self.tokens.items():
+                checks = []
+                if 'is_ownership_renounced_or_no_owner' in touched.get(token, ()):
+                    checks.append('is_ownership_renounced_or_no_owner')
+                if 'get_top_holders' in touched.get(token, ()):
+                    state['stale_holders'] = True
+                if state['stale_holders'] and head - state['holders_block'] >= self.holders_interval:
+                    checks.append('get_top_holders')
+                if not state['verified'] and (state['verified'] is None or now - state['source_checked'] >= self.source_recheck):
+                    checks.append('check_scam_patterns')
+                if checks:
+                    jobs[token] = checks
+        if not jobs:
+            return events
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for token, results in zip(jobs, executor.map(lambda token: self.run_checks(token, jobs[token]), jobs)):
+                for name, result in results.items():
+                    event = self.update(token, name, result, head)
+                    if event:
+                        events.append(event)
+        return events
+
+    # Runs some checks of one token on a fresh checker, so they read the chain as it is now
+    def run_checks(self, token, checks):
+        checker = Checker.ERC20Checker(token, use_browser=self.use_browser)
+        results = {}
+        for name in checks:
+            try:
+                results[name] = getattr(checker, name)()
+            except Exception as e:
+                results[name] = f"Check failed: {e}"
+        verified = source_verified(checker) if 'check_scam_patterns' in checks else None
+        with self.lock:
+            state = self.tokens.get(token)
+            if state is None:
+                return {}
+            if 'get_top_holders' in checks:
+                state['holders_block'] = self.block
+                state['stale_holders'] = False
+            if 'check_scam_patterns' in checks:
+                state['source_checked'] = time.time()
+                state['verified'] = verified
+        return results
+
+    def update_market(self, tokens, head):
+        try:
+            infos = MarketInfo.market_info(self.reader, tokens)
+        except Exception:
+            # Reported as N/A, the next Sync of the pair reads it again
+            infos = {token: None for token in tokens}
+        events = []
+        for token, info in infos.items():
+            state = self.tokens.get(token)
+            if state is None:
+                continue
+            alert = None
+            liquidity = info['liquidity_usd'] if info else 0.0
+            if state['liquidity'] and liquidity < state['liquidity'] * (1 - LIQUIDITY_DROP_ALERT):
+                alert = f"Liquidity fell {1 - liquidity / state['liquidity']:.0%} to ${liquidity:,.0f}"
+            state['liquidity'] = liquidity
+            event = self.update(token, 'market_cap', Checker.format_market_info(info), head, alert)
+            if event:
+                events.append(event)
+        return events
+
+    # Records a check result, returning a change event when it differs from the last one
+    # An event carries an alert when ownership changed, when liquidity was pulled or when a warning appeared that was not there before
+    def update(self, token, name, result, block, alert=None):
+        with self.lock:
+            state = self.tokens.get(token)
+            if state is None:
+                return None
+            before = state['results'].get(name)
+            if result == before:
+                return None
+            state['results'][name] = result
+            token_name = state['results'].get('get_name')
+        if alert is None:
+            if name == 'is_ownership_renounced_or_no_owner':
+                alert = "Ownership transferred"
+            elif name == 'check_scam_patterns' and state['verified'] and 'not verified' in str(before):
+                alert = "Source code was verified" + (", suspicious patterns found" if alarming(result) else "")
+            elif alarming(result) and not alarming(before):
+                alert = "New warning"
+        Metrics.count('watch_changes_total', check=name)
+        if alert:
+            Metrics.count('watch_alerts_total', check=name)
+        return {'token': token, 'name': token_name, 'check': name, 'block': block, 'before': before, 'after': result, 'alert': alert}
+
+    # Polls for new blocks until interrupted, calling on_event(event) for every change
+    def run(self, interval=12, on_event=None):
+        while True:
+            started = time.monotonic()
+            try:
+                events = self.poll()
+            except (RpcError, OSError) as e:
+                print(f"Warning: poll failed: {e}", file=sys.stderr)
+                events = []
+            for event in events:
+                if on_event:
+                    on_event(event)
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Watch ERC-20 tokens and write a JSON line whenever a check result changes")
+    parser.add_argument('input', nargs='?', default='-', help="file with one address per line, '-' reads stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSONL output file, '-' writes to stdout")
+    parser.add_argument('--interval', type=float, default=float(os.getenv('WATCH_POLL_INTERVAL', 12)), help="seconds between two polls for new blocks")
+    parser.add_argument('--holders-interval', type=int, default=HOLDERS_INTERVAL, help="blocks between two re-evaluations of a token's top holders")
+    parser.add_argument('--workers', type=int, default=8, help="number of tokens checked at the same time")
+    parser.add_argument('--alerts-only', action='store_true', help="only write changes that carry an alert")
+    parser.add_argument('--browser', action='store_true', help="allow the scraping fallbacks, this imports selenium")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        Clients.ensure_connected()
+    except ConnectionError as e:
+        sys.exit(str(e))
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    with source:
+        addresses = [line.strip() for line in source if line.strip() and not line.strip().startswith('#')]
+    watchlist = Watchlist(workers=args.workers, use_browser=args.browser, holders_interval=args.holders_interval)
+    valid = []
+    for address in addresses:
+        try:
+            valid.append(to_checksum_address(address))
+        except ValueError:
+            print(f"Skipping invalid address {address}", file=sys.stderr)
+    watchlist.add(valid)
+    print(f"Watching {len(watchlist.tokens)} tokens from block {watchlist.block}", file=sys.stderr)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+
+    def on_event(event):
+        if args.alerts_only and not event['alert']:
+            return
+        out.write(json.dumps(event, default=str) + "\n")
+        out.flush()
+
+    try:
+        watchlist.run(args.interval, on_event)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import standins
+import Registry
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Profile run without --browser, its pages are fetched over plain HTTP so the benchmark works on machines without Chrome
+DEFAULT_PROFILE = 'browserless'
+
+# Distinct token addresses per phase, so no phase is answered from the cache filled by another
+def token_addresses(phase, count):
+    return ['0x' + f"{phase:04x}" + f"{i:036x}" for i in range(count)]
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+def latency_summary(seconds):
+    return {'p50_ms': round(percentile(seconds, 0.5) * 1000, 2), 'p95_ms': round(percentile(seconds, 0.95) * 1000, 2), 'mean_ms': round(statistics.mean(seconds) * 1000, 2) if seconds else 0.0}
+
+# Times each check on its own, with a new checker and token for every sample
+def measure_checks(Checker, checks, tokens, options):
+    results = {}
+    for check in checks:
+        samples = []
+        for address in tokens[check]:
+            started = time.perf_counter()
+            getattr(Checker.ERC20Checker(address, **options), check)()
+            samples.append(time.perf_counter() - started)
+        results[check] = latency_summary(samples)
+    return results
+
+# Times the full concurrent analysis of one token at a time, as the GUI runs it
+def measure_end_to_end(Checker, Orchestrator, checks, tokens, options):
+    samples = []
+    timed_out = 0
+    for address in tokens:
+        started = time.perf_counter()
+        results = Orchestrator.CheckOrchestrator(Checker.ERC20Checker(address, **options)).run(checks)
+        samples.append(time.perf_counter() - started)
+        timed_out += sum(1 for result in results.values() if result in (Orchestrator.TIMED_OUT, Orchestrator.CANCELLED))
+    return dict(latency_summary(samples), timed_out=timed_out)
+
+# Scans many tokens at once the way BulkScan does and reports tokens per second
+def measure_bulk(BulkScan, Orchestrator, checks, tokens, workers, options):
+    limiter = Orchestrator.BackendLimiter({'rpc': 16, 'etherscan': 4})
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        records = list(executor.map(lambda address: BulkScan.scan_token(address, checks, limiter, 6, options=options), tokens))
+    elapsed = time.perf_counter() - started
+    return {'tokens': len(records), 'seconds': round(elapsed, 3), 'tokens_per_s': round(len(records) / elapsed, 2), 'errors': sum(1 for record in records if record['errors'])}
+
+# Lists the metrics that got worse than the baseline by more than the tolerance, latencies up or throughput down
+def regressions(results, baseline, tolerance):
+    found = []
+    for check, latency in results['checks'].items():
+        before = baseline.get('checks', {}).get(check)
+        if before and latency['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+            found.append(f"{check} p50 {before['p50_ms']}ms -> {latency['p50_ms']}ms")
+    before = baseline.get('end_to_end')
+    if before and results['end_to_end']['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+        found.append(f"end to end p50 {before['p50_ms']}ms -> {results['end_to_end']['p50_ms']}ms")
+    before = baseline.get('bulk')
+    if before and results['bulk']['tokens_per_s'] < before['tokens_per_s'] * (1 - tolerance):
+        found.append(f"bulk throughput {before['tokens_per_s']} -> {results['bulk']['tokens_per_s']} tokens/s")
+    return found
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ERC20Checker offline against local stand-ins for Etherscan, the Ethereum node and the scraped sites")
+    parser.add_argument('--samples', type=int, default=20, help="tokens timed per check and end to end")
+    parser.add_argument('--bulk-tokens', type=int, default=100, help="tokens in the bulk throughput run")
+    parser.add_argument('--workers', type=int, default=8, help="tokens scanned at the same time in the bulk run")
+    parser.add_argument('--browser', action='store_true', help="run the full profile, rendering in headless Chrome the pages plain HTTP cannot read")
+    parser.add_argument('--js-pages', default='', help="pages the stand-ins serve as JavaScript shells, so they must be rendered: honeypot, holders, dextools")
+    parser.add_argument('--latency', default='rpc=0.02,etherscan=0.08,pages=0.15', help="seconds added to each response per backend (rpc, etherscan, pages)")
+    parser.add_argument('--errors', default='', help="fraction of requests per backend answered with HTTP 503, e.g. rpc=0.02")
+    parser.add_argument('--throttle', default='', help="fraction of requests per backend answered with HTTP 429, each must slow its host down in the rate limiter, e.g. etherscan=0.05")
+    parser.add_argument('--baseline', default=BASELINE, help="baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results as the new baseline instead of comparing")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown against the baseline before failing, 0.25 is 25%%")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    js_pages = [page.strip() for page in args.js_pages.split(',') if page.strip()]
+    servers = standins.StandIns(latency=standins.parse_spec(args.latency), errors=standins.parse_spec(args.errors), js_pages=js_pages, throttle=standins.parse_spec(args.throttle)).start()
+    # The checker modules read their endpoints and cache location at import, so the environment is set first
+    os.environ.update(servers.environ())
+    os.environ['CHECKER_CACHE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='bench-checker-'), 'cache.sqlite3')
+    if not args.browser:
+        os.environ['MARKET_DEXTOOLS_FALLBACK'] = '0'
+    import Checker
+    import Orchestrator
+    import BulkScan
+    import FetchBackends
+    import RateLimiter
+
+    profile = Registry.PROFILES['full' if args.browser else DEFAULT_PROFILE]
+    checks, options = profile['checks'], profile['options']
+    try:
+        results = {
+            'settings': {'latency': args.latency, 'errors': args.errors, 'samples': args.samples, 'bulk_tokens': args.bulk_tokens, 'workers': args.workers, 'checks': checks, 'js_pages': js_pages},
+            'checks': measure_checks(Checker, checks, {check: token_addresses(i + 1, args.samples) for i, check in enumerate(checks)}, options),
+            'end_to_end': measure_end_to_end(Checker, Orchestrator, checks, token_addresses(0x100, args.samples), options),
+            'bulk': measure_bulk(BulkScan, Orchestrator, checks, token_addresses(0x200, args.bulk_tokens), args.workers, options),
+            'requests': dict(servers.requests),
+            'fetch': FetchBackends.fetch_stats.stats(),
+            'throttled': {'served': servers.throttled, 'limiter': sum(host['throttled'] for host in RateLimiter.get_limiter().stats().values())},
+        }
+    finally:
+        servers.stop()
+        FetchBackends.shutdown()
+        if args.browser:
+            import DriverPool
+            DriverPool.shutdown()
+
+    found = []
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            found = regressions(results, json.load(f), args.tolerance)
+    # Every 429 the stand-ins sent has to reach the rate limiter, a retry below it would hide the throttling
+    if results['throttled']['limiter'] < results['throttled']['served']:
+        found.append(f"{results['throttled']['served']} responses were 429 but the rate limiter only saw {results['throttled']['limiter']}")
+
+    if args.json:
+        print(json.dumps(dict(results, regressions=found), indent=2))
+    else:
+        print(f"{'check':<36} {'p50 ms':>9} {'p95 ms':>9}")
+        for check, latency in results['checks'].items():
+            print(f"{check:<36} {latency['p50_ms']:>9} {latency['p95_ms']:>9}")
+        print(f"{'end to end':<36} {results['end_to_end']['p50_ms']:>9} {results['end_to_end']['p95_ms']:>9}")
+        print(f"bulk: {results['bulk']['tokens']} tokens in {results['bulk']['seconds']}s, {results['bulk']['tokens_per_s']} tokens/s, {results['bulk']['errors']} with errors")
+        for page, fetched in results['fetch'].items():
+            print(f"fetch {page}: served {fetched['served']}, escalated {fetched['escalations']}, failed {fetched['failures']}")
+        if results['throttled']['served']:
+            print(f"throttled: {results['throttled']['served']} 429 responses, {results['throttled']['limiter']} reported to the rate limiter")
+        for regression in found:
+            print(f"REGRESSION: {regression}")
+    sys.exit(1 if found else 0)
+
+if __name__ == "__main__":
+    main()
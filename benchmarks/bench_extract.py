@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Extractors
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Saved page -> extractor that reads it
+PAGES = {
+    'honeypot.html': Extractors.parse_honeypot,
+    'etherscan_holders.html': Extractors.parse_holders,
+    'dextools.html': Extractors.parse_dextools,
+}
+
+# The BeautifulSoup parsing the scrapers used before, kept to compare against when bs4 is installed
+def soup_baseline(name, page_source):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page_source, 'lxml')
+    if name == 'honeypot.html':
+        return [(li.find('h4').get_text().strip(), li.find('p').get_text().strip()) for li in soup.find_all('li') if li.find('h4')]
+    if name == 'etherscan_holders.html':
+        return [[td.get_text().strip() for td in tr.find_all('td')] for tr in soup.select('#maintable table tbody tr')[:10]]
+    return [(label.text, label.find_next_sibling('span').text) for label in soup.find_all('label')]
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the page extractors on saved HTML fixtures and check their output")
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--max-ms', type=float, help="fail if parsing any page takes longer than this many milliseconds")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(FIXTURES, 'expected.json'), encoding='utf-8') as f:
+        expected = json.load(f)
+
+    results = []
+    failed = False
+    for name, extractor in PAGES.items():
+        with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+            page_source = f.read()
+        correct = extractor(page_source) == expected[name]
+        row = {'page': name, 'kb': round(len(page_source) / 1024), 'correct': correct, 'extractor_ms': round(timed(lambda: extractor(page_source), args.repeat), 3)}
+        try:
+            row['soup_ms'] = round(timed(lambda: soup_baseline(name, page_source), max(1, args.repeat // 10)), 3)
+        except ImportError:
+            row['soup_ms'] = None
+        if not correct or (args.max_ms is not None and row['extractor_ms'] > args.max_ms):
+            failed = True
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'page':<24} {'KB':>5} {'correct':>8} {'extract ms':>11} {'soup ms':>9}")
+        for row in results:
+            print(f"{row['page']:<24} {row['kb']:>5} {str(row['correct']):>8} {row['extractor_ms']:>11} {str(row['soup_ms']):>9}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import RuleEngine
+
+# Builds a large synthetic contract out of typical Solidity lines so the benchmark runs offline
+def synthetic_contract(size, seed):
+    rng = random.Random(seed)
+    lines = [
+        "    function transfer(address recipient, uint256 amount) public override returns (bool) {",
+        "        _transfer(_msgSender(), recipient, amount);",
+        "        require(balanceOf[sender] >= amount, \"ERC20: transfer amount exceeds balance\");",
+        "    mapping(address => mapping(address => uint256)) private _allowances;",
+        "    event Transfer(address indexed from, address indexed to, uint256 value);",
+        "    // SPDX-License-Identifier: MIT",
+        "    uint256 private constant MAX = ~uint256(0);",
+        "        emit Approval(owner, spender, amount);",
+        "    }",
+        # Lines the bundled rules flag, including matches that overlap or sit inside another rule's match
+        "    function setWhitelist(address account, bool value) external onlyOwner { _user_setWhitelist[account] = value; }",
+        "    bool public swapAndLiquifyEnabled = true; address public _Owner = 0x000000000000000000000000000000000000dEaD;",
+    ]
+    parts = []
+    length = 0
+    while length < size:
+        line = rng.choice(lines)
+        parts.append(line)
+        length += len(line) + 1
+    return "\n".join(parts)
+
+# Loads .sol files and saved Etherscan SourceCode .json files from a directory, or builds a synthetic corpus
+def load_corpus(directory, count, size):
+    if directory:
+        corpus = []
+        for path in sorted(glob.glob(os.path.join(directory, '*'))):
+            with open(path, encoding='utf-8', errors='replace') as f:
+                corpus.append(f.read())
+        return corpus
+    return [synthetic_contract(size, seed) for seed in range(count)]
+
+# Adds generated literal rules so the cost of a growing rule set can be measured
+def grown_rules(base, total):
+    rules = list(base.rules)
+    for i in range(total - len(rules)):
+        rules.append(RuleEngine.Rule(id=f"generated-{i}", pattern=f"function hiddenFee{i}(uint256 value) external onlyOwner"))
+    return RuleEngine.RuleSet(rules)
+
+# The original approach: one re.search over the whole source per pattern
+def naive_scanner(rules):
+    patterns = [re.compile(rule.regex()) for rule in rules.rules]
+    return lambda source_code: [pattern.pattern for pattern in patterns if pattern.search(source_code)]
+
+# Every match of every rule found with one re.finditer per rule, the hits the engine has to report
+def naive_hits(rules, source_code):
+    hits = []
+    for file, content in RuleEngine.split_sources(source_code):
+        for rule in rules.rules:
+            hits.extend((file, rule.id, match.start()) for match in re.finditer(rule.regex(), content))
+    return sorted(hits)
+
+# Sources where the engine's hits differ from the per-rule scan
+def mismatches(rules, corpus):
+    return [i for i, source_code in enumerate(corpus) if sorted((hit.file, hit.rule.id, hit.offset) for hit in rules.scan(source_code)) != naive_hits(rules, source_code)]
+
+def timed(function, corpus, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for source_code in corpus:
+            function(source_code)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark of the scam rule engine against per-pattern regex searches")
+    parser.add_argument('--corpus', help="directory of contract sources, a synthetic corpus is generated when omitted")
+    parser.add_argument('--count', type=int, default=20, help="number of synthetic contracts")
+    parser.add_argument('--size', type=int, default=500000, help="size in characters of each synthetic contract")
+    parser.add_argument('--rule-counts', default='7,50,200', help="comma separated rule set sizes to measure")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus, args.count, args.size)
+    total_mb = sum(len(source_code) for source_code in corpus) / 1e6
+    base = RuleEngine.RuleSet.load()
+    results = []
+    for count in [int(n) for n in args.rule_counts.split(',')]:
+        rules = grown_rules(base, count)
+        engine = timed(rules.scan, corpus, args.repeat)
+        naive = timed(naive_scanner(rules), corpus, args.repeat)
+        results.append({'rules': len(rules.rules), 'corpus_mb': round(total_mb, 2), 'engine_s': round(engine, 4), 'naive_s': round(naive, 4), 'engine_mb_per_s': round(total_mb / engine, 1), 'mismatched_sources': mismatches(rules, corpus)})
+    failed = any(row['mismatched_sources'] for row in results)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'rules':>6} {'corpus MB':>10} {'engine s':>10} {'naive s':>10} {'engine MB/s':>12}")
+        for row in results:
+            print(f"{row['rules']:>6} {row['corpus_mb']:>10} {row['engine_s']:>10} {row['naive_s']:>10} {row['engine_mb_per_s']:>12}")
+            if row['mismatched_sources']:
+                print(f"MISMATCH: with {row['rules']} rules the engine's hits differ from the per-rule scan in sources {row['mismatched_sources']}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from eth_utils import to_checksum_address
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import standins
+import Registry
+
+# Distinct token addresses, the last byte avoids multiples of 10 so every token is verified and its source is never looked up again
+def token_addresses(count):
+    return ['0x' + 'cafe' + f"{i:034x}" + '01' for i in range(count)]
+
+# Simulates activity on the stand-in chain: transfers and swaps on random tokens, one ownership transfer and one liquidity pull
+# Returns the tokens whose ownership and liquidity changed, which must be reported as alerts
+def simulate(rng, tokens, blocks, poll_every, watchlist, activity):
+    holders = [standins.HOLDER_PREFIX + f"{i:036x}" for i in range(40)]
+    owned, pulled = tokens[0], tokens[1]
+    events = []
+    polls = 0
+    for block in range(blocks):
+        standins.chain.mine()
+        for token in tokens:
+            if rng.random() < activity:
+                standins.chain.transfer(token, holders[0], rng.choice(holders[1:]), standins.TOTAL_SUPPLY // 1000)
+            # Once pulled the pool stays drained, a later swap would otherwise refill it before the pull is confirmed
+            if rng.random() < activity and not (token == pulled and block >= blocks // 2):
+                standins.chain.sync(token, int(50 * 10 ** 18 * rng.uniform(0.9, 1.1)), standins.TOTAL_SUPPLY // 10)
+        if block == blocks // 4:
+            standins.chain.transfer_ownership(owned, holders[1])
+        if block == blocks // 2:
+            standins.chain.sync(pulled, 10 ** 18, standins.TOTAL_SUPPLY // 10)
+        if block % poll_every == 0:
+            events += watchlist.poll()
+            polls += 1
+    # The last events only count once they have the watchlist's confirmations
+    standins.chain.mine(watchlist.confirmations)
+    events += watchlist.poll()
+    return events, polls + 1, owned, pulled
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Follow a watchlist on a simulated chain served by the local stand-ins and compare its requests with full re-checks")
+    parser.add_argument('--tokens', type=int, default=200, help="tokens on the watchlist")
+    parser.add_argument('--blocks', type=int, default=100, help="blocks mined during the run")
+    parser.add_argument('--poll-every', type=int, default=1, help="blocks between two polls")
+    parser.add_argument('--activity', type=float, default=0.05, help="chance per block that a token has a transfer, and again a swap")
+    parser.add_argument('--latency', default='rpc=0.002,etherscan=0.005', help="seconds added to each response per backend (rpc, etherscan, pages)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    servers = standins.StandIns(latency=standins.parse_spec(args.latency), seed=args.seed).start()
+    # The checker modules read their endpoints and cache location at import, so the environment is set first
+    os.environ.update(servers.environ())
+    os.environ['CHECKER_CACHE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='bench-watchlist-'), 'cache.sqlite3')
+    import Checker
+    import Orchestrator
+    import Watchlist
+
+    tokens = token_addresses(args.tokens)
+    try:
+        watchlist = Watchlist.Watchlist()
+        started = time.perf_counter()
+        watchlist.add(tokens)
+        added = time.perf_counter() - started
+
+        # Requests of one re-check of an already analyzed token, as the GUI or BulkScan would send it with a warm cache
+        before = sum(servers.requests.values())
+        sample = tokens[:10]
+        for address in sample:
+            Orchestrator.CheckOrchestrator(Checker.ERC20Checker(address, **Registry.PROFILES['onchain']['options'])).run(Registry.PROFILES['onchain']['checks'])
+        per_recheck = (sum(servers.requests.values()) - before) / len(sample)
+
+        before = sum(servers.requests.values())
+        started = time.perf_counter()
+        events, polls, owned, pulled = simulate(random.Random(args.seed), tokens, args.blocks, args.poll_every, watchlist, args.activity)
+        elapsed = time.perf_counter() - started
+        watched = sum(servers.requests.values()) - before
+    finally:
+        servers.stop()
+
+    alerts = [event for event in events if event['alert']]
+    missing = []
+    if not any(event['token'] == to_checksum_address(owned) and event['check'] == 'is_ownership_renounced_or_no_owner' and event['alert'] for event in events):
+        missing.append(f"ownership transfer of {owned}")
+    if not any(event['token'] == to_checksum_address(pulled) and event['check'] == 'market_cap' and event['alert'] for event in events):
+        missing.append(f"liquidity pull of {pulled}")
+    results = {
+        'settings': vars(args),
+        'add_seconds': round(added, 3),
+        'polls': polls,
+        'poll_seconds': round(elapsed / polls, 4),
+        'changes': len(events),
+        'alerts': len(alerts),
+        'watch_requests': watched,
+        'recheck_requests': round(per_recheck * args.tokens * polls),
+        'missing_alerts': missing,
+    }
+    results['request_ratio'] = round(results['watch_requests'] / max(1, results['recheck_requests']), 4)
+
+    if args.json:
+        print(json.dumps(dict(results, alert_events=alerts), indent=2, default=str))
+    else:
+        print(f"watching {args.tokens} tokens, added in {results['add_seconds']}s")
+        print(f"{polls} polls over {args.blocks} blocks, {results['poll_seconds'] * 1000:.1f} ms per poll")
+        print(f"{results['changes']} changes, {results['alerts']} alerts")
+        for alert in alerts:
+            print(f"  block {alert['block']} {alert['token']} {alert['check']}: {alert['alert']}")
+        print(f"requests: {watched} watching vs {results['recheck_requests']} re-checking every token each poll ({results['request_ratio']:.2%})")
+        for event in missing:
+            print(f"MISSING ALERT: {event}")
+    sys.exit(1 if missing else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, keccak
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Bytecode
+import HolderIndex
+import MarketInfo
+import Multicall
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+HEAD_BLOCK = 18000000
+DEPLOY_BLOCK = 17990000
+TOTAL_SUPPLY = 10 ** 27
+# Holder addresses start with this prefix, eth_getCode answers '0x' for them so they are reported as individuals
+HOLDER_PREFIX = '0xbeef'
+# Every token has a Uniswap V2 WETH pair at its address with the first two bytes replaced by this prefix
+PAIR_PREFIX = '0xabab'
+DEAD_ADDRESS = '0x000000000000000000000000000000000000dEaD'
+OWNERSHIP_TRANSFERRED_TOPIC = '0x' + keccak(text='OwnershipTransferred(address,address)').hex()
+SYNC_TOPIC = '0x' + keccak(text='Sync(uint112,uint112)').hex()
+# Most node providers refuse eth_getLogs ranges wider than this
+MAX_LOG_RANGE = 10000
+
+def selector(signature):
+    return function_signature_to_4byte_selector(signature)
+
+def pair_of(token):
+    return (PAIR_PREFIX + token[6:]).lower()
+
+def topic_of(address):
+    return '0x' + address[2:].lower().rjust(64, '0')
+
+# Blocks mined after HEAD_BLOCK and what happened in them, shared by every stand-in server in the process
+# The watchlist benchmark uses it to transfer tokens and ownership and to move pool reserves while the checker follows the chain
+class Chain():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.head = HEAD_BLOCK
+        self.owners = {}
+        self.reserves = {}
+        self.logs = []
+
+    def mine(self, blocks=1):
+        with self.lock:
+            self.head += blocks
+            return self.head
+
+    def emit(self, address, topics, data='0x'):
+        with self.lock:
+            self.logs.append({'address': address.lower(), 'blockNumber': hex(self.head), 'topics': topics, 'data': data})
+
+    def transfer(self, token, sender, receiver, value):
+        self.emit(token, [HolderIndex.TRANSFER_TOPIC, topic_of(sender), topic_of(receiver)], '0x' + f"{value:064x}")
+
+    def transfer_ownership(self, token, new_owner):
+        previous = self.owners.get(token.lower(), DEAD_ADDRESS)
+        self.owners[token.lower()] = new_owner
+        self.emit(token, [OWNERSHIP_TRANSFERRED_TOPIC, topic_of(previous), topic_of(new_owner)])
+
+    # Sets the WETH and token reserves of the token's pair, as a swap or a liquidity change would
+    def sync(self, token, weth_reserve, token_reserve):
+        pair = pair_of(token)
+        self.reserves[pair] = (weth_reserve, token_reserve)
+        self.emit(pair, [SYNC_TOPIC], '0x' + encode(['uint112', 'uint112'], [weth_reserve, token_reserve]).hex())
+
+    def logs_of(self, address):
+        with self.lock:
+            return [log for log in self.logs if log['address'] == address]
+
+chain = Chain()
+
+# Runtime code served for every token, it pushes the setFee(uint256) selector so the bytecode scan has a finding
+TOKEN_CODE = bytes.fromhex('6080604052') + b'\x63' + selector('setFee(uint256)') + b'\x14\x00'
+
+ERC20_SOURCE = """// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+contract BenchToken {
+    mapping(address => uint256) private _balances;
+    mapping(address => bool) private _whitelist;
+    uint256 private _totalSupply;
+
+    function transfer(address recipient, uint256 amount) public returns (bool) {
+        _transfer(msg.sender, recipient, amount);
+        return true;
+    }
+
+    function setWhitelist(address account, bool value) external onlyOwner {
+        _whitelist[account] = value;
+    }
+}
+"""
+
+# Parses "name=value,name=value" into a dict of floats, e.g. the --latency and --errors flags
+def parse_spec(spec):
+    values = {}
+    for entry in filter(None, (spec or '').split(',')):
+        name, _, value = entry.partition('=')
+        values[name.strip()] = float(value)
+    return values
+
+# Tokens whose last address byte is a multiple of 10 are served as unverified, so the bytecode path is exercised too
+def is_verified(address):
+    return int(address[-2:], 16) % 10 != 0
+
+# The Transfer logs of a token, a mint to the deployer then transfers to a fixed set of holders, deterministic per token
+@lru_cache(maxsize=1024)
+def transfer_logs(token, count=200):
+    rng = random.Random(token)
+    holders = [HOLDER_PREFIX + f"{i:036x}" for i in range(40)]
+    deployer = holders[0]
+    logs = [(DEPLOY_BLOCK, HolderIndex.ZERO_ADDRESS, deployer, TOTAL_SUPPLY)]
+    for i in range(count):
+        block = DEPLOY_BLOCK + 1 + i * ((HEAD_BLOCK - DEPLOY_BLOCK - 100) // count)
+        logs.append((block, deployer, rng.choice(holders[1:]), TOTAL_SUPPLY // (count * 4)))
+    return [{
+        'address': token,
+        'blockNumber': hex(block),
+        'topics': [HolderIndex.TRANSFER_TOPIC, '0x' + sender[2:].rjust(64, '0'), '0x' + receiver[2:].rjust(64, '0')],
+        'data': '0x' + f"{value:064x}",
+    } for block, sender, receiver, value in logs]
+
+# Answers one contract call by selector, None means the call reverts
+def contract_call(to, data):
+    to = to.lower()
+    function = data[:4]
+    if function == selector('getReserves()'):
+        if to == MarketInfo.USDC_WETH_PAIR.lower():
+            return encode(['uint112', 'uint112', 'uint32'], [2000 * 10 ** 6 * 10000, 10000 * 10 ** 18, 0])
+        # token0 of every other pair is WETH, so reserve0 is the WETH side
+        weth_reserve, token_reserve = chain.reserves.get(to, (50 * 10 ** 18, TOTAL_SUPPLY // 10))
+        return encode(['uint112', 'uint112', 'uint32'], [weth_reserve, token_reserve, 0])
+    if function == selector('token0()'):
+        return encode(['address'], [MarketInfo.WETH])
+    if function == selector('getPair(address,address)'):
+        token = decode(['address', 'address'], data[4:])[0]
+        return encode(['address'], [pair_of(token)])
+    if function == selector('name()'):
+        return encode(['string'], ["Bench Token"])
+    if function == selector('symbol()'):
+        return encode(['string'], ["BENCH"])
+    if function == selector('decimals()'):
+        return encode(['uint8'], [18])
+    if function == selector('totalSupply()'):
+        return encode(['uint256'], [TOTAL_SUPPLY])
+    if function == selector('owner()'):
+        return encode(['address'], [chain.owners.get(to, DEAD_ADDRESS)])
+    return None
+
+def eth_call(params):
+    to, data = params[0]['to'], bytes.fromhex(params[0]['data'][2:])
+    if to.lower() == Multicall.MULTICALL3_ADDRESS.lower():
+        calls = decode(['(address,bool,bytes)[]'], data[4:])[0]
+        results = []
+        for target, _, call_data in calls:
+            result = contract_call(target, call_data)
+            results.append((result is not None, result or b''))
+        return '0x' + encode(['(bool,bytes)[]'], [results]).hex()
+    result = contract_call(to, data)
+    if result is None:
+        raise StandInError(3, "execution reverted")
+    return '0x' + result.hex()
+
+# Filters by one address or a list of them and by the first topic, one topic or a list of them, like a node does
+def eth_get_logs(params):
+    query = params[0]
+    start, end = int(query['fromBlock'], 16), int(query['toBlock'], 16)
+    if end - start + 1 > MAX_LOG_RANGE:
+        raise StandInError(-32005, f"query returned more than 10000 results, block range limit is {MAX_LOG_RANGE}")
+    addresses = query['address'] if isinstance(query['address'], list) else [query['address']]
+    first_topic = (query.get('topics') or [None])[0]
+    topics = None if first_topic is None else {topic.lower() for topic in ([first_topic] if isinstance(first_topic, str) else first_topic)}
+    logs = []
+    for address in addresses:
+        address = address.lower()
+        history = transfer_logs(address) if not address.startswith(PAIR_PREFIX) else []
+        for log in history + chain.logs_of(address):
+            if start <= int(log['blockNumber'], 16) <= end and (topics is None or log['topics'][0] in topics):
+                logs.append(log)
+    return logs
+
+def eth_get_code(params):
+    address, block = params[0].lower(), params[1]
+    if address.startswith(HOLDER_PREFIX):
+        return '0x'
+    if block not in ('latest', 'pending') and int(block, 16) < DEPLOY_BLOCK:
+        return '0x'
+    return '0x' + TOKEN_CODE.hex()
+
+class StandInError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+RPC_METHODS = {
+    'web3_clientVersion': lambda params: "standin/1.0",
+    'eth_chainId': lambda params: '0x1',
+    'net_version': lambda params: '1',
+    'eth_blockNumber': lambda params: hex(chain.head),
+    'eth_call': eth_call,
+    'eth_getLogs': eth_get_logs,
+    'eth_getCode': eth_get_code,
+}
+
+def rpc_reply(request):
+    try:
+        method = RPC_METHODS.get(request.get('method'))
+        if method is None:
+            raise StandInError(-32601, "Method not found")
+        return {'jsonrpc': '2.0', 'id': request.get('id'), 'result': method(request.get('params') or [])}
+    except StandInError as e:
+        return {'jsonrpc': '2.0', 'id': request.get('id'), 'error': {'code': e.code, 'message': e.message}}
+
+# getsourcecode and getabi replies in Etherscan's format, unverified tokens get the reply Etherscan gives for them
+def etherscan_reply(query):
+    action = query.get('action', [''])[0]
+    address = query.get('address', [''])[0]
+    abi = json.dumps(Bytecode.ERC20_ABI)
+    if not is_verified(address):
+        if action == 'getabi':
+            return {'status': '0', 'message': 'NOTOK', 'result': "Contract source code not verified"}
+        return {'status': '1', 'message': 'OK', 'result': [{'SourceCode': '', 'ABI': "Contract source code not verified", 'ContractName': ''}]}
+    if action == 'getabi':
+        return {'status': '1', 'message': 'OK', 'result': abi}
+    return {'status': '1', 'message': 'OK', 'result': [{'SourceCode': ERC20_SOURCE, 'ABI': abi, 'ContractName': 'BenchToken'}]}
+
+# honeypot.is API reply with the values of fixtures/honeypot.html
+HONEYPOT_REPLY = {
+    'honeypotResult': {'isHoneypot': False},
+    'simulationResult': {'buyTax': 0, 'sellTax': 4.5, 'transferTax': 0},
+    'holderAnalysis': {'holders': '1482', 'successful': '1482', 'failed': '0', 'siphoned': '0'},
+}
+
+# A page that only has content once its script runs, as single page apps serve it to clients without JavaScript
+def js_shell(page):
+    return ('<html><head><title>Loading</title></head><body><div id="root"></div><script>document.open();document.write('
+        + json.dumps(page.decode('utf-8')).replace('</', '<\\/') + ');document.close();</script></body></html>').encode()
+
+# Route -> backend name used for the latency and error settings
+def backend_of(path):
+    if path.startswith('/rpc'):
+        return 'rpc'
+    if path.startswith('/api'):
+        return 'etherscan'
+    return 'pages'
+
+# This class serves every stand-in from one local HTTP server, each backend with its own latency and error rate
+# throttle is the fraction of requests per backend answered with a 429, the count of those is kept in throttled
+# Pages named in js_pages (honeypot, holders, dextools) are served as JavaScript shells that only a browser can read
+class StandIns():
+    def __init__(self, latency=None, errors=None, seed=0, js_pages=(), throttle=None):
+        self.latency = latency or {}
+        self.errors = errors or {}
+        self.throttle = throttle or {}
+        self.throttled = 0
+        self.js_pages = set(js_pages)
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.requests = {}
+        self.lock = threading.Lock()
+        self.pages = {}
+        for name in ('honeypot.html', 'etherscan_holders.html', 'dextools.html'):
+            with open(os.path.join(FIXTURES, name), 'rb') as f:
+                self.pages[name] = f.read()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # Environment that points the checker at the stand-ins, to be set before Checker is imported
+    def environ(self):
+        return {
+            'ETH_RPC_URL': self.url + '/rpc',
+            'ETHERSCAN_API_URL': self.url + '/api',
+            'ETHERSCAN_URL': self.url,
+            'HONEYPOT_URL': self.url,
+            'HONEYPOT_API_URL': self.url,
+            'DEXTOOLS_URL': self.url,
+            'ETHERSCAN_API_KEY': 'standin',
+            'INFURA_API_KEY': 'standin',
+            'RATE_LIMITS': '127.0.0.1=100000/100000',
+        }
+
+    # Sleeps for the backend's latency with +-20% jitter and returns the error status this request should fail with, if any
+    def delay(self, backend):
+        with self.rng_lock:
+            jitter = self.rng.uniform(0.8, 1.2)
+            failed = self.rng.random() < self.errors.get(backend, 0)
+            throttled = self.rng.random() < self.throttle.get(backend, 0)
+        with self.lock:
+            self.requests[backend] = self.requests.get(backend, 0) + 1
+            self.throttled += throttled
+        if self.latency.get(backend):
+            time.sleep(self.latency[backend] * jitter)
+        return 429 if throttled else 503 if failed else None
+
+    def page(self, path, query):
+        if path.startswith('/ethereum'):
+            return self.shell('honeypot', self.pages['honeypot.html'])
+        if path.startswith('/app/en/ether/pair-explorer/'):
+            return self.shell('dextools', self.pages['dextools.html'])
+        if path.startswith('/token/generic-tokenholders2'):
+            return self.shell('holders', self.pages['etherscan_holders.html'])
+        if path.startswith('/token/'):
+            address = path.split('/')[2]
+            return f'<html><body><iframe id="tokeholdersiframe" src="/token/generic-tokenholders2?a={address}"></iframe></body></html>'.encode()
+        return None
+
+    def shell(self, name, page):
+        return js_shell(page) if name in self.js_pages else page
+
+    def handler(self):
+        standins = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately, without this every keep-alive reply waits for a delayed ACK
+            disable_nagle_algorithm = True
+
+            def reply(self, status, body, content_type='application/json'):
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', '0')
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                status = standins.delay(backend_of(url.path))
+                if status:
+                    return self.reply(status, b'{"error": "injected"}')
+                if url.path.startswith('/api'):
+                    return self.reply(200, json.dumps(etherscan_reply(parse_qs(url.query))).encode())
+                if url.path.startswith('/v2/IsHoneypot'):
+                    # With the honeypot page served as a shell its API is down too, so the check has to render the page
+                    if 'honeypot' in standins.js_pages:
+                        return self.reply(503, b'{"error": "unavailable"}')
+                    return self.reply(200, json.dumps(HONEYPOT_REPLY).encode())
+                page = standins.page(url.path, url.query)
+                if page is None:
+                    return self.reply(404, b'not found', 'text/plain')
+                self.reply(200, page, 'text/html; charset=utf-8')
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                status = standins.delay('rpc')
+                if status:
+                    return self.reply(status, b'{"error": "injected"}')
+                request = json.loads(body)
+                replies = [rpc_reply(r) for r in request] if isinstance(request, list) else rpc_reply(request)
+                self.reply(200, json.dumps(replies).encode())
+
+            def log_message(self, *args):
+                pass
+
+        return Handler